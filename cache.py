@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """In-memory LRU cache whose entries go stale after `ttl` seconds.
+
+    Stale entries are still returned right away while a background task
+    refreshes them. Entries older than `ttl + max_stale` are reloaded
+    before returning, and the least recently used entry is evicted once
+    `max_entries` is reached. Values for which `stale_if(value)` is true,
+    like a snapshot built while a source was down, are stored already stale
+    so the next read refreshes them.
+    """
+
+    def __init__(self, ttl, max_stale, max_entries, stale_if=None):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.stale_if = stale_if
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._refreshing = {}  # key -> background refresh task
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def set(self, key, value):
+        stored_at = time.monotonic()
+        if self.stale_if is not None and self.stale_if(value):
+            stored_at -= self.ttl
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def peek(self, key):
+        """Return (value, age in seconds) without touching the LRU order, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        return value, time.monotonic() - stored_at
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    async def get(self, key, loader):
+        """Return the cached value for key, calling `await loader(key)` on a miss.
+
+        A loader returning None is treated as a failed load and is not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if age <= self.ttl + self.max_stale:
+                self._entries.move_to_end(key)
+                if age > self.ttl:
+                    self.refresh(key, loader)
+                return value
+
+        value = await loader(key)
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def refresh(self, key, loader):
+        """Reload key in the background unless a refresh is already running."""
+        task = self._refreshing.get(key)
+        if task is not None and not task.done():
+            return task
+
+        async def run():
+            try:
+                value = await loader(key)
+                if value is not None:
+                    self.set(key, value)
+            except Exception as e:
+                print(f"Error refreshing cache entry {key}: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        task = asyncio.create_task(run())
+        self._refreshing[key] = task
+        return task
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight call.
+
+    Every caller that arrives while a call for its key is running awaits
+    that call's result (or exception) instead of starting its own.
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> running task
+
+    def __contains__(self, key):
+        return key in self._calls
+
+    async def do(self, key, fn, *args):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        # Shielded so one impatient caller cannot cancel the shared call for everyone
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller gave up
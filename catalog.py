@@ -0,0 +1,132 @@
+import re
+from difflib import get_close_matches
+from functools import lru_cache
+
+# Game modes, maps and regions /findmatch understands. Every lookup table is
+# built once at import so nothing scans these lists per server or per keystroke.
+
+MODES = {
+    "tdm": 128, "ml": 138, "bd": 275, "cp": 135, "ve": 136, "gg": 15,
+}
+MODE_NAMES = {
+    "Team Death Match": 128, "Missile Launch": 138, "Bomb Disposal": 275,
+    "Capture Points": 135, "Vehicle Escort": 136, "Gun Game": 15,
+}
+MAPS = {
+    "area15base": 21, "area15bunker": 22, "citypoint": 13, "cologne": 44,
+    "desert": 0, "escape": 6, "flooded": 4, "frontier": 31, "goldmine": 47,
+    "heist": 32, "kitchen": 29, "moonbase": 20, "northwest": 1, "office": 3,
+    "pacific": 2, "remagen": 8, "siege": 39, "skullisland": 24, "southwest": 7,
+    "spacestation": 38, "temple": 5, "thesomme": 15, "tomb": 14, "tribute": 18,
+    "tribute(cyberpunk)": 19, "cyberpunk": 19, "zengarden": 43, "containers": 37,
+    "crisscross": 40, "dwarfsdungeon": 28, "dwarf'sdungeon": 28, "dwarfdungeon": 28,
+    "hanger": 25, "pyramid": 36, "quarry": 27, "sniperalley": 35, "snipersonly": 41,
+    "threelane": 34, "towerofpower": 33,
+}
+
+CLASSIC_REGIONS = ("USA", "USA_WEST", "ASIA", "JAPAN", "EUROPE", "INDIA", "AUSTRALIA", "RUSSIA")
+FOURVFOUR_REGIONS = ("USA_4V4", "EU_4V4", "ASIA_4V4")
+
+# Discord shows at most this many autocomplete choices
+MAX_CHOICES = 25
+
+
+def normalize(name):
+    """Lowercase and drop everything but letters and digits, so 'Dwarf's Dungeon' == 'dwarfsdungeon'."""
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def game_regions(game):
+    return CLASSIC_REGIONS if game == "classic" else FOURVFOUR_REGIONS
+
+
+# id -> display name
+MODE_NAME_BY_ID = {mode_id: name for name, mode_id in MODE_NAMES.items()}
+MAP_NAME_BY_ID = {}
+for _name, _map_id in MAPS.items():
+    # The first spelling listed for a map is its display name
+    MAP_NAME_BY_ID.setdefault(_map_id, _name.capitalize())
+
+# normalized name -> id, accepting short codes, full names and every alias
+MODE_IDS = {normalize(name): mode_id for name, mode_id in {**MODES, **MODE_NAMES}.items()}
+MAP_IDS = {normalize(name): map_id for name, map_id in MAPS.items()}
+REGION_IDS = {normalize(region): region for region in CLASSIC_REGIONS + FOURVFOUR_REGIONS}
+
+
+def mode_name(mode_id):
+    return MODE_NAME_BY_ID.get(mode_id, "Unknown")
+
+
+def map_name(map_id):
+    return MAP_NAME_BY_ID.get(map_id, "Unknown")
+
+
+def suggest(name, index, n=3):
+    """Closest known names to a misspelled one, best first."""
+    return get_close_matches(normalize(name), index, n=n, cutoff=0.5)
+
+
+class NgramIndex:
+    """Substring search over a fixed set of choices, backed by 1- to 3-gram postings.
+
+    A query is answered by intersecting the postings of its n-grams and then
+    confirming the substring, so only the few matching choices are looked at.
+    """
+
+    N = 3
+
+    def __init__(self, choices):
+        # choices: (search term, display name, value); several terms may share a value
+        self._terms = []
+        self._postings = {}
+        for term, name, value in choices:
+            key = normalize(term)
+            position = len(self._terms)
+            self._terms.append((key, name, value))
+            for size in range(1, self.N + 1):
+                for start in range(len(key) - size + 1):
+                    self._postings.setdefault(key[start:start + size], set()).add(position)
+        self.complete = lru_cache(maxsize=1024)(self._complete)
+
+    def _candidates(self, query):
+        size = min(len(query), self.N)
+        grams = {query[start:start + size] for start in range(len(query) - size + 1)}
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        return set.intersection(*postings) if postings else set()
+
+    def _complete(self, query):
+        """(display name, value) pairs for choices containing query, prefix matches first."""
+        query = normalize(query)
+        if query:
+            hits = [
+                (self._terms[position][0].find(query), position)
+                for position in self._candidates(query)
+                if query in self._terms[position][0]
+            ]
+            positions = [position for _, position in sorted(hits)]
+        else:
+            positions = range(len(self._terms))
+
+        results = []
+        seen = set()
+        for position in positions:
+            _, name, value = self._terms[position]
+            if value not in seen:
+                seen.add(value)
+                results.append((name, value))
+                if len(results) == MAX_CHOICES:
+                    break
+        return tuple(results)
+
+
+MODE_SEARCH = NgramIndex(
+    [(term, MODE_NAME_BY_ID[mode_id], code) for code, mode_id in MODES.items() for term in (MODE_NAME_BY_ID[mode_id], code)]
+)
+MAP_SEARCH = NgramIndex(
+    [(name, MAP_NAME_BY_ID[map_id], normalize(MAP_NAME_BY_ID[map_id])) for name, map_id in MAPS.items()]
+)
+# Keyed by the /findmatch game value, None while no game has been picked yet
+REGION_SEARCH = {
+    game: NgramIndex([(region, region, region) for region in regions])
+    for game, regions in (("classic", CLASSIC_REGIONS), ("4v4", FOURVFOUR_REGIONS), (None, CLASSIC_REGIONS + FOURVFOUR_REGIONS))
+}
@@ -0,0 +1,183 @@
+import asyncio
+import math
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+import storage
+
+# Append-only history of the numbers in each PlayerSnapshot, for /progress.
+#
+# history.dat is a sequence of fixed-width records. Every record stores the
+# offset of the previous record for the same uid, so the latest N points of a
+# player are N seeks back from its newest record. history.idx maps each uid to
+# that newest offset and remembers how much of the data file it covers, so a
+# start only reads the records appended after the index was last written.
+
+HISTORY_FILE = os.getenv('HISTORY_FILE', 'history.dat')
+HISTORY_INDEX_FILE = os.getenv('HISTORY_INDEX_FILE', 'history.idx')
+
+# Numbers kept per point, in record order
+FIELDS = (
+    'fetched_at', 'level', 'xp', 'kills', 'deaths', 'kills_elo', 'games_elo',
+    'classic_wins', 'br_wins', 'zombie_br_wins'
+)
+FLOAT_FIELDS = ('fetched_at', 'kills_elo', 'games_elo')
+
+# uid as 12 raw bytes, offset of the uid's previous record (-1 for none), then FIELDS
+RECORD = struct.Struct('<12sq' + ''.join('d' if field in FLOAT_FIELDS else 'q' for field in FIELDS))
+NO_PREVIOUS = -1
+# Stored in place of a number the snapshot did not have
+MISSING_INT = -1
+
+
+def snapshot_values(snapshot):
+    return tuple(getattr(snapshot, field) for field in FIELDS)
+
+
+def pack(uid, previous, values):
+    packed = []
+    for field, value in zip(FIELDS, values):
+        if field in FLOAT_FIELDS:
+            packed.append(math.nan if value is None else float(value))
+        else:
+            packed.append(MISSING_INT if value is None else int(value))
+    return RECORD.pack(bytes.fromhex(uid), previous, *packed)
+
+
+def unpack(record):
+    raw_uid, previous, *packed = RECORD.unpack(record)
+    values = {}
+    for field, value in zip(FIELDS, packed):
+        missing = math.isnan(value) if field in FLOAT_FIELDS else value == MISSING_INT
+        values[field] = None if missing else value
+    return raw_uid.hex(), previous, values
+
+
+class HistoryStore:
+    """Append-only, fixed-width history of player numbers, keyed by uid.
+
+    All file work runs on the store's own thread; the index is only changed on
+    the event loop. A point is only appended when one of its numbers differs
+    from the uid's newest point.
+    """
+
+    def __init__(self, path=HISTORY_FILE, index_path=HISTORY_INDEX_FILE):
+        self.path = path
+        self.index = {"length": 0, "latest": {}}
+        self.index_persister = storage.JsonPersister(index_path, self.index)
+        self._latest_values = {}  # uid -> values of its newest point, once read
+        self._lock = asyncio.Lock()
+        self._executor = None
+        self._file = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def open(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history')
+            await self._run(self._open)
+            self.index_persister.start()
+
+    def _open(self):
+        self._file = open(self.path, 'a+b')
+        size = self._file.seek(0, os.SEEK_END)
+        # Drop a record left half written by a crash
+        if size % RECORD.size:
+            size -= size % RECORD.size
+            self._file.truncate(size)
+
+        saved = storage.read_json(self.index_persister.path)
+        if saved and saved.get("length", 0) <= size:
+            self.index.update(saved)
+        # Catch the index up with records appended after it was last saved
+        self._file.seek(self.index["length"])
+        offset = self.index["length"]
+        while offset < size:
+            uid, _, _ = unpack(self._file.read(RECORD.size))
+            self.index["latest"][uid] = offset
+            offset += RECORD.size
+        if self.index["length"] != size:
+            self.index["length"] = size
+            self.index_persister.mark_dirty()
+
+    async def close(self):
+        if self._executor is not None:
+            await self.index_persister.close()
+            await self._run(self._file.close)
+            self._executor.shutdown()
+            self._executor = None
+            self._file = None
+
+    def _read(self, offset):
+        self._file.seek(offset)
+        return unpack(self._file.read(RECORD.size))
+
+    def _append(self, record):
+        offset = self._file.seek(0, os.SEEK_END)
+        self._file.write(record)
+        self._file.flush()
+        return offset
+
+    async def record(self, snapshot):
+        """Append the snapshot's numbers unless they match the player's newest point."""
+        uid = snapshot.uid
+        # Compared as stored, so a missing number reads back the same as it went in
+        values = tuple(unpack(pack(uid, NO_PREVIOUS, snapshot_values(snapshot)))[2].values())
+        async with self._lock:
+            previous = self.index["latest"].get(uid, NO_PREVIOUS)
+            if uid not in self._latest_values and previous != NO_PREVIOUS:
+                self._latest_values[uid] = tuple((await self._run(self._read, previous))[2].values())
+            latest = self._latest_values.get(uid)
+            if latest is not None and latest[1:] == values[1:]:
+                return
+            offset = await self._run(self._append, pack(uid, previous, values))
+            self.index["latest"][uid] = offset
+            self.index["length"] = offset + RECORD.size
+            self._latest_values[uid] = values
+            self.index_persister.mark_dirty()
+
+    def _points(self, offset, limit, since):
+        points = []
+        while offset != NO_PREVIOUS and (limit is None or len(points) < limit):
+            _, offset, values = self._read(offset)
+            points.append(values)
+            if since is not None and values["fetched_at"] < since:
+                break
+        return points
+
+    async def points(self, uid, limit=None, since=None):
+        """The uid's points, newest first.
+
+        Stops after `limit` points, or at the first point older than `since`
+        (which is included, as the baseline for a window starting then).
+        """
+        return await self._run(self._points, self.index["latest"].get(uid, NO_PREVIOUS), limit, since)
+
+
+def columns(points):
+    """Turn points into {field: [values]}, keeping their order."""
+    return {field: [point[field] for point in points] for field in FIELDS}
+
+
+def deltas(points, window, now=None):
+    """Change of every field over the last `window` seconds, from newest-first points.
+
+    Returns ({field: change or None}, seconds actually covered). The baseline is
+    the newest point at least `window` old, or the oldest point when history
+    does not reach back that far.
+    """
+    if not points:
+        return {}, 0
+    now = now if now is not None else time.time()
+    stored = columns(points)
+    times = stored['fetched_at']
+    start = now - window
+    base = next((row for row, fetched_at in enumerate(times) if fetched_at <= start), len(times) - 1)
+
+    changes = {}
+    for field in FIELDS[1:]:
+        newest, oldest = stored[field][0], stored[field][base]
+        changes[field] = newest - oldest if newest is not None and oldest is not None else None
+    return changes, times[0] - times[base]
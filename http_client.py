@@ -0,0 +1,145 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+import aiohttp
+from ratelimit import AdaptiveTokenBucket, CircuitBreaker, CircuitOpenError, RateLimitTimeout  # noqa: F401
+
+# A single pooled aiohttp session shared by every upstream call.
+# It is created in the bot's setup_hook and closed when the bot shuts down.
+_session = None
+
+# One rate limiter and one circuit breaker per upstream host, created on first use
+_buckets = {}
+_breakers = {}
+
+
+def _env_number(name, default):
+    value = os.getenv(name)
+    return type(default)(value) if value else default
+
+
+async def start():
+    """Create the shared session if it is not running yet."""
+    global _session
+    if _session is not None and not _session.closed:
+        return _session
+
+    connector = aiohttp.TCPConnector(
+        limit=_env_number('HTTP_LIMIT', 100),
+        limit_per_host=_env_number('HTTP_LIMIT_PER_HOST', 10),
+        keepalive_timeout=_env_number('HTTP_KEEPALIVE', 30.0),
+        use_dns_cache=True,
+        ttl_dns_cache=_env_number('HTTP_DNS_TTL', 300)
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=_env_number('HTTP_TIMEOUT', 15.0),
+        connect=_env_number('HTTP_CONNECT_TIMEOUT', 5.0)
+    )
+    _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return _session
+
+
+async def close():
+    """Close the shared session and release its pooled connections."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def get_session():
+    if _session is None or _session.closed:
+        raise RuntimeError("HTTP client is not started")
+    return _session
+
+
+def get_bucket(url):
+    """The rate limiter for the host of url."""
+    host = urlsplit(url).hostname
+    bucket = _buckets.get(host)
+    if bucket is None:
+        bucket = _buckets[host] = AdaptiveTokenBucket(
+            rate=_env_number('HTTP_RATE', 5.0),
+            burst=_env_number('HTTP_BURST', 10),
+            min_rate=_env_number('HTTP_MIN_RATE', 0.5),
+            max_rate=_env_number('HTTP_MAX_RATE', 20.0),
+            max_pause=_env_number('HTTP_MAX_PAUSE', 60.0),
+            max_wait=_env_number('HTTP_MAX_WAIT', 10.0)
+        )
+    return bucket
+
+
+def get_breaker(url):
+    """The circuit breaker for the host of url."""
+    host = urlsplit(url).hostname
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker(
+            host,
+            failure_threshold=_env_number('BREAKER_FAILURES', 5),
+            reset_timeout=_env_number('BREAKER_RESET', 30.0)
+        )
+    return breaker
+
+
+def is_available(url):
+    """False while requests to the host of url are being refused by its circuit breaker."""
+    return get_breaker(url).available
+
+
+def metrics():
+    """Rate limiter and circuit breaker state per host, kept apart since both count failures."""
+    hosts = {}
+    for host, bucket in list(_buckets.items()):
+        hosts.setdefault(host, {})["limiter"] = bucket.metrics()
+    for host, breaker in list(_breakers.items()):
+        hosts.setdefault(host, {})["breaker"] = breaker.metrics()
+    return hosts
+
+
+@asynccontextmanager
+async def _get(url):
+    """GET url once its host's limiter allows it, feeding the answer back to the limiter and breaker.
+
+    Raises CircuitOpenError right away while the host's circuit is open, and
+    RateLimitTimeout when the limiter cannot let it through within its max_wait;
+    the latter is not held against the host.
+    """
+    breaker = get_breaker(url)
+    trial = breaker.before_request()
+    bucket = get_bucket(url)
+    try:
+        await bucket.acquire()
+        async with get_session().get(url) as response:
+            bucket.record(response.status, response.headers.get('Retry-After'))
+            if response.status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            yield response
+    except RateLimitTimeout:
+        # Our own queue was too long and nothing was sent, so the host's breaker and limiter learn nothing
+        raise
+    except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+        bucket.record_failure()
+        breaker.record_failure()
+        raise
+    finally:
+        # A trial that ended some other way, such as being cancelled, must not hold the circuit half-open
+        if trial:
+            breaker.end_trial()
+
+
+async def fetch_text(url):
+    """GET a url and return (status, text)."""
+    async with _get(url) as response:
+        return response.status, await response.text()
+
+
+async def fetch_json(url):
+    """GET a url and return (status, decoded json or None)."""
+    async with _get(url) as response:
+        if response.status != 200:
+            return response.status, None
+        return response.status, await response.json(content_type=None)
@@ -1,5 +1,6 @@
-from flask import Flask
+from flask import Flask, jsonify
 from threading import Thread
+import http_client
 
 app = Flask('')
 
@@ -7,6 +8,11 @@ app = Flask('')
 def home():
     return "Bot is alive!"
 
+@app.route('/metrics')
+def metrics():
+    # Per-host rate limiter and circuit breaker state for the upstream stats sites
+    return jsonify(http_client.metrics())
+
 def run():
     app.run(host="0.0.0.0", port=8080)
 
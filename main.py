@@ -1,17 +1,25 @@
 import discord
 from discord.ui import Button, View
 from keep_alive import keep_alive
-import aiohttp 
+import http_client
+import catalog
+from cache import TTLCache, SingleFlight
+import parsers
+import sources
+import storage
+import history
+from servers import ServerPoller
+from warmer import PlayerWarmer
+from sendqueue import SendQueue, interaction_route
+from snapshots import SquadSnapshot
 import os
 import json
-import requests
 from discord import ui
-from bs4 import BeautifulSoup
 from discord import app_commands
 import asyncio
 import math
+import time
 from discord.ext import commands
-from difflib import get_close_matches
 import logging
 import re
 from dotenv import load_dotenv
@@ -30,21 +38,36 @@ logging.getLogger('discord.gateway').setLevel(logging.ERROR)
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix='/', intents=intents)
+
+class WBStatsBot(commands.Bot):
+    async def setup_hook(self):
+        await link_store.open()
+        await history_store.open()
+        squad_persister.start()
+        # Open the shared HTTP client once for the whole bot lifetime
+        await http_client.start()
+        server_poller.start()
+        player_warmer.start()
+
+    async def close(self):
+        await player_warmer.stop()
+        await server_poller.stop()
+        await super().close()
+        await http_client.close()
+        await link_store.close()
+        await history_store.close()
+        await squad_persister.close()
+
+bot = WBStatsBot(command_prefix='/', intents=intents)
 async def main():
     bot = commands.Bot(command_prefix="/", intents=discord.Intents.all())
 
     # Load the setup function
     await bot
 
-# Create a global aiohttp session that can be used across the bot's lifetime
-session = None
-
 # Event handler for bot ready
 @bot.event
 async def on_ready():
-    global session
-    session = aiohttp.ClientSession()  # Initialize aiohttp session when bot is ready
     print(f'Logged in as {bot.user}')
     try:
         num = await bot.tree.sync()
@@ -55,52 +78,109 @@ async def on_ready():
 
 
 
-# Storage setup
-STORAGE_FILE = 'storage.json'
+# Linked accounts, in SQLite (imported once from storage.json) or storage.json itself
+link_store = storage.create_link_store()
 
-def load_player_data():
-    """Load player data from storage.json."""
-    if os.path.exists(STORAGE_FILE):
+# Per-squad member aggregates, so /squad only re-reads members who played since the last run
+SQUAD_STORAGE_FILE = 'squads.json'
+
+def load_squad_data():
+    """Load squad aggregates from squads.json."""
+    if os.path.exists(SQUAD_STORAGE_FILE):
         try:
-            with open(STORAGE_FILE, 'r') as f:
-                data = json.load(f)
-                # Convert old format to new format if necessary
-                for user_id, value in data.items():
-                    if isinstance(value, str):
-                        data[user_id] = {"uid": value, "pfp": None}
-                
-                return data
+            with open(SQUAD_STORAGE_FILE, 'r') as f:
+                return json.load(f)
         except (json.JSONDecodeError, IOError) as e:
-            print(f"Error loading storage file: {e}")
+            print(f"Error loading squad storage file: {e}")
     return {}
 
-def save_player_data(data):
-    """Save player data to storage.json."""
-    try:
-        with open(STORAGE_FILE, 'w') as f:
-            json.dump(data, f, indent=4)
-            
-    except IOError as e:
-        print(f"Error saving storage file: {e}")
+squad_data = load_squad_data()
+# Written behind, so a burst of /squad runs costs one write
+squad_persister = storage.JsonPersister(SQUAD_STORAGE_FILE, squad_data)
 
-# Load player data at the module level
-player_data = load_player_data()
+async def get_uid(user_id):
+    return await link_store.get(user_id)
 
-def get_uid(user_id):
-    user_data = player_data.get(str(user_id), {})
-    if isinstance(user_data, dict):
-        return user_data.get("uid"), user_data.get("pfp")
-    else:
-        return user_data, None  # For backwards compatibility
+async def set_uid(user_id, uid, pfpimgurlink=None):
+    await link_store.set(user_id, uid, pfpimgurlink)
+
+async def delete_uid(user_id):
+    await link_store.delete(user_id)
+
+# Total XP needed to reach each level up to 24; later levels cost a flat 25,000 XP each
+LEVELS_EXP = {
+    0: 0, 1: 100, 2: 500, 3: 31500, 4: 3000, 5: 5000,
+    6: 11000, 7: 18000, 8: 27000, 9: 37000, 10: 48000,
+    11: 60000, 12: 73000, 13: 87000, 14: 102000, 15: 117000,
+    16: 132000, 17: 147000, 18: 162000, 19: 177000, 20: 192000,
+    21: 207000, 22: 222000, 23: 237000, 24: 250000
+}
+
+# Emoji for each medal tier shown on the stats embed
+MEDAL_EMOJIS = {
+    'Gold': '<:goldStar:1298137739694182440>',
+    'Silver': '<:silverStar:1298137743003488367>',
+    'Bronze': '<:bronzeStar:1298137736083148800>',
+    'Ribbon': '',
+    'Unearned': ''
+}
+
+# Ranks by Kills ELO, lowest first, as (name, ELO needed, emoji); used by /stats and /ranks
+RANKS = [
+    ("Bronze", 1500, "<:bronze:1297740711617237064>"),
+    ("Iron", 1600, "<:iron:1297740730101534730>"),
+    ("Silver", 1700, "<:silver:1297740740314529812>"),
+    ("Gold", 1800, "<:gold:1297740724347080785>"),
+    ("Platinum", 1900, "<:platinum:1297740737307344916>"),
+    ("Diamond", 2000, "<:diamond:1297740714821550121>"),
+    ("Elite", 2100, "<:elite:1297740717803962400>"),
+    ("Immortal", 2200, "<:immortal:1297740727433822342>"),
+    ("Mythic", 2300, "<:mythic:1297740733968810064>"),
+    ("Eternal", 2400, "<:eternal:1297740721226252338>")
+]
+
+# Parsed player snapshots keyed by uid
+player_cache = TTLCache(
+    ttl=int(os.getenv('PLAYER_CACHE_TTL', 120)),
+    max_stale=int(os.getenv('PLAYER_CACHE_MAX_STALE', 3600)),
+    max_entries=int(os.getenv('PLAYER_CACHE_SIZE', 2000)),
+    # Snapshots missing a source are served but refreshed on the next lookup
+    stale_if=lambda snapshot: bool(snapshot.unavailable)
+)
+
+# Every distinct set of numbers seen for a player, for /progress
+history_store = history.HistoryStore()
+
+# In-flight upstream work, shared between concurrent identical lookups
+player_flights = SingleFlight()
+member_flights = SingleFlight()
+squad_flights = SingleFlight()
+
+# Outbound followups and edits, retried per Discord route on rate limits
+send_queue = SendQueue(retries=int(os.getenv('DISCORD_SEND_RETRIES', 4)))
 
-def set_uid(user_id, uid, pfpimgurlink=None):
-    player_data[str(user_id)] = {"uid": uid, "pfp": pfpimgurlink}
-    save_player_data(player_data)
+# Squads being collected right now, with the totals gathered so far
+squad_progress = {}
 
-def delete_uid(user_id):
-    if str(user_id) in player_data:
-        del player_data[str(user_id)]
-        save_player_data(player_data)
+# How many member profiles /squad reads at once, and how often it edits the running totals
+SQUAD_CONCURRENCY = int(os.getenv('SQUAD_CONCURRENCY', 5))
+SQUAD_PROGRESS_INTERVAL = float(os.getenv('SQUAD_PROGRESS_INTERVAL', 3))
+
+# Show a parsed number, or N/A when the page did not have it
+def format_stat(value):
+    if value is None:
+        return "N/A"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return f"{value:,}"
+
+# Show an age in seconds as minutes, hours or days
+def format_age(seconds):
+    if seconds < 3600:
+        return f"{max(int(seconds // 60), 1)} min"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} h"
+    return f"{int(seconds // 86400)} days"
 
 # Function to calculate KD progress
 def calculate_kd_progress(kills, deaths):
@@ -119,304 +199,265 @@ def calculate_kd_progress(kills, deaths):
 
     return kd_goal, kills_needed, kd_avoid, deaths_to_avoid
 
-async def fetch_daily_rankings(uid: str):
-    try:
-        url = f"https://stats.warbrokers.io/players/i/{uid}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                text = await response.text()
-
-        soup = BeautifulSoup(text, 'html.parser')
-
-        daily_rankings = soup.find("div", id="player-details-dailies-content")
-        if daily_rankings:
-            rankings = []
-            ranking_elements = daily_rankings.find_all("div", class_="player-details-daily-circle-container")
-            for element in ranking_elements:
-                medal = element.find("div", class_="player-details-daily-circle").text.strip()
-                title = element.find("div", class_="tooltip-header").text.strip()
-                rankings.append(f"{medal} - {title}")
-
-            if rankings:
-                rankings_embed = discord.Embed(
-                    title="🏆 Daily Rankings",
-                    description="\n".join(rankings),
-                    color=0x3498db
-                )
-                return rankings_embed
-            else:
-                return discord.Embed(
-                    title="No Daily Rankings",
-                    description="No daily rankings for you today!",
-                    color=0x3498db
-                )
-        else:
-            return discord.Embed(
-                title="No Daily Rankings",
-                description="No daily rankings for you today!",
-                color=0x3498db
-            )
-    except Exception as e:
-        print(f"Error in fetch_daily_rankings: {e}")
+# Function to format the daily rankings parsed along with the rest of the profile
+def build_daily_rankings_embed(snapshot):
+    if snapshot.dailies:
         return discord.Embed(
-            title="Error",
-            description="Failed to fetch daily rankings. Please try again later.",
-            color=0xFF0000
+            title="🏆 Daily Rankings",
+            description="\n".join(f"{medal} - {title}" for medal, title in snapshot.dailies),
+            color=0x3498db
         )
-# Function to fetch player stats and format as an embed
-async def fetch_player_stats(ctx: discord.Interaction, uid: str, pfp_link=None):
-    responded = False  # Initialize the responded variable at the start
-    try:
-        url1 = f"https://stats.warbrokers.io/players/i/{uid}"
-        response1 = requests.get(url1)
-        soup1 = BeautifulSoup(response1.text, 'html.parser')
+    return discord.Embed(
+        title="No Daily Rankings",
+        description="No daily rankings for you today!",
+        color=0x3498db
+    )
+
+# Function to format a parsed player snapshot as an embed
+def build_player_stats(snapshot, pfp_link=None, unavailable=None, cached_age=None):
+    """Stats embed and view for a snapshot.
+
+    A snapshot built while a source was down, or an old cached one shown
+    because sources are down now, gets a note naming the unavailable hosts.
+    """
+    uid = snapshot.uid
+    player_level = snapshot.level
+    player_exp = snapshot.xp
+    player_elo = snapshot.kills_elo
+
+    wlr = 0
+    if snapshot.m00_losses is not None:
+        # Calculate WLR (Wins / Losses) using only "m00" losses
+        total_wins = snapshot.classic_wins or 0
+        wlr = total_wins / snapshot.m00_losses if snapshot.m00_losses > 0 else 0
+
+        if snapshot.last_seen:
+            last_seen_formatted = f"<t:{snapshot.last_seen}:R>"
+        else:
+            last_seen_formatted = "Data not available"
+    else:
+        last_seen_formatted = "Failed to fetch last seen data"
 
-        general = {}
+    # XP percent calculation
+    if player_exp is None:
+        exp_text = "N/A"
+    else:
+        if player_level > 23:
+            exp_needed = (250000 + (25000 * (player_level - 23))) - player_exp
+            exp_progress = math.floor(100 * (1 - (exp_needed / 25000)))
+        else:
+            exp_needed = LEVELS_EXP[player_level + 1] - player_exp
+            exp_progress = math.floor(100 * (1 - (exp_needed / (LEVELS_EXP[player_level + 1] - LEVELS_EXP[player_level]))))
+        exp_text = f"{exp_progress}% ({exp_needed} XP to go)"
+
+    kills = snapshot.kills
+    deaths = snapshot.deaths
+    current_kd = kills / deaths if kills is not None and deaths else 0
+
+    # Calculate KD goal, kills needed, and deaths to avoid
+    if kills is not None and deaths:
+        kd_goal, kills_needed, kd_avoid, deaths_to_avoid = calculate_kd_progress(kills, deaths)
+
+    current_rank = None
+    next_rank_elo = None
+    for rank, elo_threshold, emoji in RANKS:
+        if player_elo is None:
+            break
+        if player_elo >= elo_threshold:
+            current_rank = (rank, emoji)
+        else:
+            next_rank_elo = elo_threshold
+            break
+
+    # Create stats embed
+    stats_embed = discord.Embed(
+        title=f"🛡️ Stats of {snapshot.name} 🛡️",
+        description="Proud stats of a fearless fighter! 🏹",
+        color=0x2ecc71
+    )
 
-        if response1.status_code == 200:
-            player_data1 = {}
+    stats_embed.set_thumbnail(url=pfp_link if pfp_link else "https://i.imgur.com/Rt6nDrT.png")
+
+    stats_embed.add_field(name="📜 Stats ID", value=uid, inline=False)
+
+    if current_rank:
+        rank_name, rank_emoji = current_rank
+        elo_needed = (next_rank_elo - player_elo) if next_rank_elo else 0
+        elo_needed_text = f"({elo_needed:.0f} ELO more needed for next rank)" if next_rank_elo else "(Max rank reached)"
+        stats_embed.add_field(name="🎖️ Rank", value=f"{rank_emoji} {rank_name} {elo_needed_text}\n*Use /ranks for more info*", inline=False)
+
+    stats_embed.add_field(name="🔹 Level", value=player_level, inline=True)
+    stats_embed.add_field(name="⏳ XP Progress", value=f"{exp_text}\n*Type `/expinfo` for more!*", inline=True)
+
+    # Last Seen Online
+    stats_embed.add_field(name="🕐 Last Active", value=last_seen_formatted, inline=True)
+    stats_embed.add_field(name="🔫 Kills", value=format_stat(kills), inline=True)
+    stats_embed.add_field(name="⚖️ W/L Ratio", value=f"{wlr:.2f}", inline=True)
+    stats_embed.add_field(name="⚖️ K/D", value=format_stat(snapshot.kd), inline=True)
+    stats_embed.add_field(name="🏆 Classic Mode Wins", value=format_stat(snapshot.classic_wins), inline=True)
+    stats_embed.add_field(name="🏆 BR Wins", value=format_stat(snapshot.br_wins), inline=True)
+    stats_embed.add_field(name="🏆 Zombie BR Wins", value=format_stat(snapshot.zombie_br_wins), inline=True)
+    stats_embed.add_field(name="🏅 Kills ELO", value=str(int(player_elo)) if player_elo is not None else "N/A", inline=True)
+    stats_embed.add_field(name="🏆 Games ELO", value=str(int(snapshot.games_elo)) if snapshot.games_elo is not None else "N/A", inline=True)
+
+    # Add other fields as needed
+    stats_embed.add_field(name="\u200B", value="\u200B", inline=True)
+
+    # Create medals display string
+    ribbons_str = []
+    for medal_type, count in snapshot.medal_counts(parsers.MEDAL_TIERS).items():
+        emoji = MEDAL_EMOJIS[medal_type]
+        display_emoji = emoji + ' ' if count > 0 and emoji else ''
+        ribbons_str.append(f"{display_emoji}{medal_type}: {count}")
+
+    stats_embed.add_field(
+        name="🏅 Medals",
+        value="\n".join(ribbons_str),
+        inline=False
+    )
 
-            header_elements = soup1.find_all("div", class_="player-details-number-box-header")
-            value_elements = soup1.find_all("div", class_="player-details-number-box-value")
+    if kills is not None and deaths:
+        stats_embed.add_field(
+            name="🎯 K/D Goal",
+            value=(
+                f"To boost your K/D to {round(current_kd + 0.1, 1)}, you need **{kills_needed} more kills**! "
+                f"And remember, avoid **{deaths_to_avoid} deaths**"
+            ),
+            inline=False
+        )
 
-            for header, value in zip(header_elements, value_elements):
-                header_text = header.text.strip()
-                value_text = value.text.strip()
-                player_data1[header_text] = value_text
+    # Say which source was down, so missing or old numbers aren't mistaken for real ones
+    unavailable = unavailable or snapshot.unavailable
+    if unavailable:
+        note = f"{', '.join(unavailable)} can't be reached right now."
+        if cached_age is not None:
+            note += f" Showing cached stats from {format_age(cached_age)} ago."
+        else:
+            note += " Numbers from it are from the last full lookup, or N/A when there was none."
+        stats_embed.add_field(name="⚠️ Partial Stats", value=note, inline=False)
 
-            player_name_element1 = soup1.find("div", class_="page-header")
-            player_name_parts = player_name_element1.get_text(strip=True).split('Lvl')
-            player_name = player_name_parts[0].strip()
-            player_level = int(player_name_parts[1].strip())
+    if not pfp_link:
+        stats_embed.add_field(
+            name="🖼️ Customize Your Stats",
+            value="Want a custom PFP? Use `/help` to learn how to set yours up!",
+            inline=False
+        )
 
-            # Fetch last seen data from the WarBrokers API
-            last_seen_url = f"https://wbapi.wbpjs.com/players/getPlayer?uid={uid}"
-            last_seen_response = requests.get(last_seen_url)
+    return stats_embed, StatsView(snapshot, stats_embed)
 
-            if last_seen_response.status_code == 200:
-                last_seen_data = last_seen_response.json()
-                m00_losses = last_seen_data.get("losses", {}).get("m00", 0)
+# Function to format a player's ribbons, grouped by medal tier
+def build_ribbons_embed(snapshot):
+    ribbons_embed = discord.Embed(
+        title=f"🎖️ Ribbons of {snapshot.name}",
+        color=0x3498db
+    )
 
-                # Fetch the player's total wins
-                total_wins = int(player_data1.get("Classic Mode Wins", "0").replace(",", ""))
+    for tier in parsers.MEDAL_TIERS:
+        ribbons = [ribbon for ribbon in snapshot.ribbons if ribbon.tier == tier]
+        if not ribbons:
+            continue
+        emoji = MEDAL_EMOJIS[tier] + ' ' if MEDAL_EMOJIS[tier] else ''
+        lines = [f"{emoji}{ribbon.name} {'✯' * ribbon.stars}".rstrip() for ribbon in ribbons]
+        value = "\n".join(lines)
+        if len(value) > 1024:
+            value = value[:1020].rsplit("\n", 1)[0] + "\n..."
+        ribbons_embed.add_field(name=f"{tier} ({len(ribbons)})", value=value, inline=False)
+
+    if not snapshot.ribbons:
+        ribbons_embed.description = "No ribbons found for this player."
+
+    return ribbons_embed
+
+# Stats buttons, the Daily Rankings and Ribbons buttons swap the embed in place
+class StatsView(discord.ui.View):
+    def __init__(self, snapshot, stats_embed):
+        super().__init__(timeout=None)
+        self.snapshot = snapshot
+        self.stats_embed = stats_embed
+        uid = snapshot.uid
+        self.add_item(discord.ui.Button(label="Main Stats", url=f"https://stats.warbrokers.io/players/i/{uid}"))
+        self.add_item(discord.ui.Button(label="ELO Stats", url=f"https://stats.wbpjs.com/players/{uid}"))
+        self.add_item(discord.ui.Button(label="Support Server", url="https://discord.gg/7BgVryKcCz"))
+
+    async def show(self, interaction: discord.Interaction, embed, button=None):
+        # Reset both toggles, then flip the one that was pressed to go back
+        self.toggle_rankings.label = "Daily Rankings"
+        self.toggle_ribbons.label = "Ribbons"
+        if button is not None:
+            button.label = "Back to Stats"
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Daily Rankings", style=discord.ButtonStyle.primary)
+    async def toggle_rankings(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if button.label == "Daily Rankings":
+            # The dailies were parsed with the stats, so this needs no upstream request
+            await self.show(interaction, build_daily_rankings_embed(self.snapshot), button)
+        else:
+            await self.show(interaction, self.stats_embed)
 
-                # Calculate WLR (Wins / Losses) using only "m00" losses
-                wlr = total_wins / m00_losses if m00_losses > 0 else 0
+    @discord.ui.button(label="Ribbons", style=discord.ButtonStyle.secondary)
+    async def toggle_ribbons(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if button.label == "Ribbons":
+            await self.show(interaction, build_ribbons_embed(self.snapshot), button)
+        else:
+            await self.show(interaction, self.stats_embed)
+
+async def fetch_and_record_player(uid: str):
+    snapshot = await sources.fetch_player(uid)
+    if snapshot is None:
+        return None
+    if snapshot.unavailable:
+        # Numbers a down source would have given are kept from the cached snapshot instead of lost
+        cached = player_cache.peek(uid)
+        if cached is not None:
+            snapshot.fill_missing(cached[0])
+    else:
+        # Partial snapshots would show up as jumps in /progress, so only complete ones are recorded
+        try:
+            await history_store.record(snapshot)
+        except Exception as e:
+            print(f"Error recording history for {uid}: {e}")
+    return snapshot
+
+# Concurrent lookups of the same uid share a single scrape
+async def load_player(uid: str):
+    return await player_flights.do(uid, fetch_and_record_player, uid)
+
+# Linked players who used the bot lately are refreshed in the background
+player_warmer = PlayerWarmer(
+    player_cache,
+    load_player,
+    link_store.recent_uids,
+    budget=float(os.getenv('WARM_PLAYERS_PER_MINUTE', 20)),
+    refresh_after=float(os.getenv('WARM_REFRESH_AFTER', player_cache.ttl * 0.75)),
+    max_idle=float(os.getenv('WARM_MAX_IDLE', 7 * 24 * 3600))
+)
 
-                last_seen_timestamp = last_seen_data.get("time")  # Assuming the API returns a 'time' field
+# Shown instead of stats when the stats sites are down and nothing is cached
+def build_unavailable_embed(hosts):
+    embed = discord.Embed(
+        title="⚠️ Stats Temporarily Unavailable",
+        description=f"{', '.join(hosts) or 'The stats sites'} can't be reached right now. Please try again in a few minutes.",
+        color=0xE67E22
+    )
+    embed.set_thumbnail(url="https://i.imgur.com/Rt6nDrT.png")
+    return embed
 
-                if last_seen_timestamp:
-                    last_seen_formatted = f"<t:{int(last_seen_timestamp)}:R>"
-                else:
-                    last_seen_formatted = "Data not available"
-            else:
-                last_seen_formatted = "Failed to fetch last seen data"
-
-            url2 = f"https://stats.wbpjs.com/players/{uid}"
-            response2 = requests.get(url2)
-
-            if response2.status_code == 200:
-                soup2 = BeautifulSoup(response2.text, 'html.parser')
-                xp_element = soup2.find('span', string='XP').find_next('span')
-                player_exp = xp_element.text.strip() if xp_element else "N/A"
-
-                # XP percent calculation
-                if player_level > 23:
-                    exp_needed = (250000 + (25000 * (player_level - 23))) - int(player_exp)
-                    exp_progress = math.floor(100 * (1 - (exp_needed / 25000)))
-                else:
-                    levels_exp = {
-                        0: 0, 1: 100, 2: 500, 3: 31500, 4: 3000, 5: 5000,
-                        6: 11000, 7: 18000, 8: 27000, 9: 37000, 10: 48000,
-                        11: 60000, 12: 73000, 13: 87000, 14: 102000, 15: 117000,
-                        16: 132000, 17: 147000, 18: 162000, 19: 177000, 20: 192000,
-                        21: 207000, 22: 222000, 23: 237000, 24: 250000
-                    }
-                    exp_needed = levels_exp[player_level + 1] - int(player_exp)
-                    exp_progress = math.floor(100 * (1 - (exp_needed / (levels_exp[player_level + 1] - levels_exp[player_level]))))
-
-                kills_elo_element = soup2.find('span', string='Kills Elo').find_next('span').text
-                games_elo_element = soup2.find('span', string='Games Elo').find_next('span').text
-
-                kills = int(player_data1.get("Kills", "0").replace(",", ""))
-                deaths = int(player_data1.get("Deaths", "0").replace(",", ""))
-                current_kd = kills / deaths if deaths > 0 else 0
-
-                classic_wins = player_data1.get("Classic Mode Wins", "N/A")
-                br_wins = player_data1.get("Battle Royale Wins", "N/A")
-                zombie_br_wins = player_data1.get("Zombie BR Wins", "N/A")
-
-                # Calculate KD goal, kills needed, and deaths to avoid
-                kd_goal, kills_needed, kd_avoid, deaths_to_avoid = calculate_kd_progress(kills, deaths)
-
-                try:
-                    # Grab all instances of ribbons
-                    content = soup1.find_all('div', class_="ribbon-wrapper")
-                    ribbon_groups = str(content).split('/images/ribbons/heartStar.png')
-                    while len(ribbon_groups) > 2:
-                        ribbon_groups.pop(0)
-                    ribbon_groups = str(content).split('purpleHeart')
-                    ribbons = str(ribbon_groups[0]).split(
-                        'style=&quot;background:#454658;&quot;&gt;'
-                    ) if len(ribbon_groups) == 3 else str(
-                        ribbon_groups[2]).split(
-                            'style=&quot;background:#454658;&quot;&gt;')
-                    ribbons.pop(0)
-                    ribbons.pop(-1)  # we don't need the purple heart ribbon
-
-                    # Define medal emojis
-                    medal_emojis = {
-                        'Gold': '<:goldStar:1298137739694182440>',
-                        'Silver': '<:silverStar:1298137743003488367>',
-                        'Bronze': '<:bronzeStar:1298137736083148800>'
-                    }
-
-                    # Initialize medals with emoji info
-                    medals = {
-                        'Gold': {'count': 0, 'emoji': medal_emojis['Gold']},
-                        'Silver': {'count': 0, 'emoji': medal_emojis['Silver']},
-                        'Bronze': {'count': 0, 'emoji': medal_emojis['Bronze']},
-                        'Ribbon': {'count': 0, 'emoji': ''},
-                        'Unearned': {'count': 0, 'emoji': ''}
-                    }
-
-                    for ribbon in ribbons:
-                        name = str(ribbon.split('&')[0])
-                        if str(ribbon).count('&amp;#10031;') == 4:
-                            medals['Gold']['count'] += 1
-                        elif str(ribbon).count('&amp;#10031;') == 3:
-                            medals['Silver']['count'] += 1
-                        elif str(ribbon).count('&amp;#10031;') == 2:
-                            medals['Bronze']['count'] += 1
-                        elif str(ribbon).count('&amp;#10031;') == 1:
-                            medals['Ribbon']['count'] += 1
-                        else:
-                            medals['Unearned']['count'] += 1
-
-                    general['Medals'] = medals
-
-                except Exception as e:
-                    print(e)
-                    general['Medals'] = {
-                        'Gold': {'count': 0, 'emoji': medal_emojis['Gold']},
-                        'Silver': {'count': 0, 'emoji': medal_emojis['Silver']},
-                        'Bronze': {'count': 0, 'emoji': medal_emojis['Bronze']},
-                        'Ribbon': {'count': 0, 'emoji': ''},
-                        'Unearned': {'count': 0, 'emoji': ''}
-                    }
-
-                player_elo = float(kills_elo_element.strip())
-
-                # Rankings defined as tuples (name, ELO, emoji)
-                rankings = [
-                    ("Bronze", 1500, "<:bronze:1297740711617237064>"),
-                    ("Iron", 1600, "<:iron:1297740730101534730>"),
-                    ("Silver", 1700, "<:silver:1297740740314529812>"),
-                    ("Gold", 1800, "<:gold:1297740724347080785>"),
-                    ("Platinum", 1900, "<:platinum:1297740737307344916>"),
-                    ("Diamond", 2000, "<:diamond:1297740714821550121>"),
-                    ("Elite", 2100, "<:elite:1297740717803962400>"),
-                    ("Immortal", 2200, "<:immortal:1297740727433822342>"),
-                    ("Mythic", 2300, "<:mythic:1297740733968810064>"),
-                    ("Eternal", 2400, "<:eternal:1297740721226252338>")
-                ]
-
-                current_rank = None
-                next_rank_elo = None
-                for rank, elo_threshold, emoji in rankings:
-                    if player_elo >= elo_threshold:
-                        current_rank = (rank, emoji)
-                    else:
-                        next_rank_elo = elo_threshold
-                        break
-
-                # Create stats embed
-                stats_embed = discord.Embed(
-                    title=f"🛡️ Stats of {player_name} 🛡️",
-                    description="Proud stats of a fearless fighter! 🏹",
-                    color=0x2ecc71
-                )
-
-                stats_embed.set_thumbnail(url=pfp_link if pfp_link else "https://i.imgur.com/Rt6nDrT.png")
-
-                stats_embed.add_field(name="📜 Stats ID", value=uid, inline=False)
-
-                if current_rank:
-                    rank_name, rank_emoji = current_rank
-                    elo_needed = (next_rank_elo - player_elo) if next_rank_elo else 0
-                    elo_needed_text = f"({elo_needed:.0f} ELO more needed for next rank)" if next_rank_elo else "(Max rank reached)"
-                    stats_embed.add_field(name="🎖️ Rank", value=f"{rank_emoji} {rank_name} {elo_needed_text}\n*Use /ranks for more info*", inline=False)
-
-                stats_embed.add_field(name="🔹 Level", value=player_level, inline=True)
-                stats_embed.add_field(name="⏳ XP Progress", value=f"{exp_progress}% ({exp_needed} XP to go)\n*Type `/expinfo` for more!*", inline=True)
-
-                # Last Seen Online
-                stats_embed.add_field(name="🕐 Last Active", value=last_seen_formatted, inline=True)
-                stats_embed.add_field(name="🔫 Kills", value=player_data1.get("Kills", "N/A"), inline=True)
-                stats_embed.add_field(name="⚖️ W/L Ratio", value=f"{wlr:.2f}", inline=True)
-                stats_embed.add_field(name="⚖️ K/D", value=player_data1.get("Kills / Death", "N/A"), inline=True)
-                stats_embed.add_field(name="🏆 Classic Mode Wins", value=classic_wins, inline=True)
-                stats_embed.add_field(name="🏆 BR Wins", value=br_wins, inline=True)
-                stats_embed.add_field(name="🏆 Zombie BR Wins", value=zombie_br_wins, inline=True)
-                stats_embed.add_field(name="🏅 Kills ELO", value=str(int(float(kills_elo_element.strip()))), inline=True)
-                stats_embed.add_field(name="🏆 Games ELO", value=str(int(float(games_elo_element.strip()))), inline=True)
-
-                # Add other fields as needed
-                stats_embed.add_field(name="\u200B", value="\u200B", inline=True)
-
-                # Create medals display string
-                ribbons_str = []
-                for medal_type, data in general['Medals'].items():
-                    count = data['count']
-                    emoji = data['emoji']
-                    display_emoji = emoji + ' ' if count > 0 and emoji else ''
-                    ribbons_str.append(f"{display_emoji}{medal_type}: {count}")
-
-                stats_embed.add_field(
-                    name="🏅 Medals",
-                    value="\n".join(ribbons_str),
-                    inline=False
-                )
-
-                stats_embed.add_field(
-                    name="🎯 K/D Goal",
-                    value=(
-                        f"To boost your K/D to {round(current_kd + 0.1, 1)}, you need **{kills_needed} more kills**! "
-                        f"And remember, avoid **{deaths_to_avoid} deaths**"
-                    ),
-                    inline=False
-                )
-
-                if not pfp_link:
-                    stats_embed.add_field(
-                        name="🖼️ Customize Your Stats",
-                        value="Want a custom PFP? Use `/help` to learn how to set yours up!",
-                        inline=False
-                    )
-
-                # Initialize the view
-                view = View()
-
-                main_stats_button = Button(label="Main Stats", url=f"https://stats.warbrokers.io/players/i/{uid}")
-                elo_stats_button = Button(label="ELO Stats", url=f"https://stats.wbpjs.com/players/{uid}")
-                support_button = Button(label="Support Server", url="https://discord.gg/7BgVryKcCz")
-                view.add_item(main_stats_button)
-                view.add_item(elo_stats_button)
-                view.add_item(support_button)
-
-                daily_rankings_button = Button(label="Daily Rankings", style=discord.ButtonStyle.primary)
-
-                async def daily_rankings_callback(interaction: discord.Interaction):
-                    rankings_embed = await fetch_daily_rankings(uid)
-                    if rankings_embed:
-                        await interaction.response.send_message(embed=rankings_embed, ephemeral=True)
-                    else:
-                        await interaction.response.send_message("Failed to fetch daily rankings. Please try again later.", ephemeral=True)
-
-                daily_rankings_button.callback = daily_rankings_callback
-                view.add_item(daily_rankings_button)
-
-                return stats_embed, view
+# Function to fetch player stats and format as an embed
+async def fetch_player_stats(ctx: discord.Interaction, uid: str, pfp_link=None):
+    try:
+        # Served from the snapshot cache when possible, stale entries refresh in the background
+        snapshot = await player_cache.get(uid, load_player)
+        if snapshot is None:
+            return None, None
+        return build_player_stats(snapshot, pfp_link)
+    except sources.SourcesUnavailable as e:
+        # Fall back to whatever is cached, however old, before giving up
+        cached = player_cache.peek(uid)
+        if cached is not None:
+            snapshot, age = cached
+            return build_player_stats(snapshot, pfp_link, unavailable=e.hosts, cached_age=age)
+        return build_unavailable_embed(e.hosts), View()
     except Exception as e:
         print(f"Error in fetch_player_stats: {e}")
         return None, None
@@ -428,32 +469,14 @@ async def stats(ctx: discord.Interaction):
     await ctx.response.defer()
 
     user_id = ctx.user.id
-    uid, pfp_link = get_uid(user_id)  # Fetching the UID and PFP link
+    uid, pfp_link = await get_uid(user_id)  # Fetching the UID and PFP link
 
     if uid:
+        await link_store.touch(user_id)
         stats_embed, view = await fetch_player_stats(ctx, uid, pfp_link)
 
         if stats_embed:
-            # Create a custom view with buttons
-            class StatsView(discord.ui.View):
-                def __init__(self):
-                    super().__init__(timeout=None)
-                    self.add_item(discord.ui.Button(label="Main Stats", url=f"https://stats.warbrokers.io/players/i/{uid}"))
-                    self.add_item(discord.ui.Button(label="ELO Stats", url=f"https://stats.wbpjs.com/players/{uid}"))
-                    self.add_item(discord.ui.Button(label="Support Server", url="https://discord.gg/7BgVryKcCz"))
-
-                @discord.ui.button(label="Daily Rankings", style=discord.ButtonStyle.primary)
-                async def toggle_rankings(self, interaction: discord.Interaction, button: discord.ui.Button):
-                    if button.label == "Daily Rankings":
-                        rankings_embed = await fetch_daily_rankings(uid)
-                        button.label = "Back to Stats"
-                        await interaction.response.edit_message(embed=rankings_embed, view=self)
-                    else:
-                        button.label = "Daily Rankings"
-                        await interaction.response.edit_message(embed=stats_embed, view=self)
-
-            custom_view = StatsView()
-            await ctx.followup.send(embed=stats_embed, view=custom_view)
+            await ctx.followup.send(embed=stats_embed, view=view)
         else:
             await ctx.followup.send("⚠️ You entered your UID wrong. Please check and try again using the /linkstats command!")
     else:
@@ -473,6 +496,16 @@ async def stats(ctx: discord.Interaction):
 async def linkstats(ctx: discord.Interaction, id: str, pfpimgurlink: str = None):
     user_id = ctx.user.id
 
+    # Accept a pasted stats page link too, but never store something that is not a uid
+    uid = storage.parse_uid(id)
+    if uid is None:
+        await ctx.response.send_message(
+            "⚠️ That doesn't look like a stats ID. It is the 24 character code at the end of your stats page link, "
+            "like ``https://stats.warbrokers.io/players/i/5d2ead35d142affb05757778``",
+            ephemeral=True
+        )
+        return
+
     # Regular expression to validate Imgur URLs
     imgur_url_pattern = r"^(https?://)?(www\.)?(imgur\.com|i\.imgur\.com)/.+\.(jpg|jpeg|png|gif)$"
 
@@ -486,7 +519,7 @@ async def linkstats(ctx: discord.Interaction, id: str, pfpimgurlink: str = None)
         response = ""
 
     # Call the function to set the user ID and profile picture
-    set_uid(user_id, id, pfpimgurlink)
+    await set_uid(user_id, uid, pfpimgurlink)
 
     # Construct the response message
     response += f"🚀 Stats ID linked for {ctx.user.mention}! 🎯 Now you're all set to use `/stats` and show off your epicness."
@@ -504,6 +537,11 @@ async def linkstats(ctx: discord.Interaction, id: str, pfpimgurlink: str = None)
 async def statsof(ctx: discord.Interaction, uid: str):
     await ctx.response.defer()
 
+    uid = storage.parse_uid(uid)
+    if uid is None:
+        await ctx.followup.send("⚠️ That doesn't look like a stats ID. Please check it and try again.")
+        return
+
     # Fetch stats without sending a message directly inside the function
     stats_embed, view = await fetch_player_stats(ctx, uid)
 
@@ -517,45 +555,158 @@ async def statsof(ctx: discord.Interaction, uid: str):
         await ctx.followup.send("Failed to retrieve player stats. Please try again later.")
 
 
+# Windows /progress compares against, in seconds
+PROGRESS_WINDOWS = {
+    "24h": ("Last 24 hours", 24 * 3600),
+    "7d": ("Last 7 days", 7 * 24 * 3600),
+    "30d": ("Last 30 days", 30 * 24 * 3600)
+}
+PROGRESS_FIELDS = [
+    ("⚔️ Kills", "kills"), ("💀 Deaths", "deaths"), ("✨ XP", "xp"),
+    ("🎯 Kills ELO", "kills_elo"), ("🎮 Games ELO", "games_elo"),
+    ("🏆 Classic Wins", "classic_wins"), ("👑 BR Wins", "br_wins"), ("🧟 Zombie BR Wins", "zombie_br_wins")
+]
+
+# Show a change in a number with its sign, or N/A when either end was missing
+def format_delta(value):
+    if value is None:
+        return "N/A"
+    if isinstance(value, float):
+        return f"{value:+.2f}"
+    return f"{value:+,}"
+
+def build_progress_embed(name, points, windows, stale=False):
+    embed = discord.Embed(title=f"📈 Progress for {name}", color=0x3498db)
+    if stale:
+        embed.description = "⚠️ Fresh numbers could not be fetched, so this only goes up to the last successful lookup."
+    now = time.time()
+    for key in windows:
+        label, window = PROGRESS_WINDOWS[key]
+        changes, covered = history.deltas(points, window, now)
+        lines = [f"{title}: {format_delta(changes[field])}" for title, field in PROGRESS_FIELDS]
+        if covered < window:
+            label += f" (history covers {covered / 3600:.0f}h)"
+        embed.add_field(name=label, value="\n".join(lines), inline=True)
+    embed.set_footer(text="Progress is tracked each time your stats are looked up.")
+    return embed
+
+@bot.tree.command(
+    name='progress',
+    description='📈 See how your stats changed over the last day, week or month!'
+)
+@app_commands.choices(window=[
+    app_commands.Choice(name=label, value=key) for key, (label, _) in PROGRESS_WINDOWS.items()
+])
+async def progress(ctx: discord.Interaction, window: app_commands.Choice[str] = None, uid: str = None):
+    await ctx.response.defer()
+
+    if uid:
+        uid = storage.parse_uid(uid)
+        if uid is None:
+            await ctx.followup.send("⚠️ That doesn't look like a stats ID. Please check it and try again.")
+            return
+    else:
+        uid, _ = await get_uid(ctx.user.id)
+        if not uid:
+            await ctx.followup.send("⚠️ Link your stats with `/linkstats` first, or pass a stats ID.")
+            return
+        await link_store.touch(ctx.user.id)
+
+    # Looking the player up records a fresh point when the numbers changed. The
+    # history itself is local, so when the stats sites are down it is still shown.
+    try:
+        snapshot = await player_cache.get(uid, load_player)
+        stale = snapshot is not None and bool(snapshot.unavailable)
+    except Exception as e:
+        if not isinstance(e, sources.SourcesUnavailable):
+            print(f"Error refreshing {uid} for /progress: {e}")
+        cached = player_cache.peek(uid)
+        snapshot = cached[0] if cached is not None else None
+        stale = True
+    windows = [window.value] if window else list(PROGRESS_WINDOWS)
+    longest = max(PROGRESS_WINDOWS[key][1] for key in windows)
+    points = await history_store.points(uid, since=time.time() - longest)
+
+    if len(points) < 2:
+        await ctx.followup.send("📈 Not enough history yet. Check back after playing a few games and using `/stats`!")
+        return
+
+    await ctx.followup.send(embed=build_progress_embed(snapshot.name if snapshot else uid, points, windows, stale))
+
+
 # Help command showing all available commands
+# Every command listed by /help, in display order
+HELP_COMMANDS = [
+    ("/stats", "🛡️ Show your stats", "Want to flex your stats? This command's got your back! Plus, you can now check your daily rankings."),
+    ("/linkstats", "🔗 Link your stats", "Tired of typing your ID every time? Link your stats and save the hassle!"),
+    ("/statsof", "📜 Show stats of any player", "Curious about another player? Enter their stats ID and check them out!"),
+    ("/progress", "📈 Show how your stats changed", "See how many kills, XP, ELO and wins you gained over the last day, week or month!"),
+    ("/expinfo", "📈 XP Breakdown", "Ever wondered how to get that next level up? This command breaks it down for you!"),
+    ("/squad", "📊 Squad Stats", "Get the average Kills ELO, Games ELO, and game mode wins for your squad."),
+    ("/findmatch", "🔍 Find Matches", "Looking for a match? This command will list active servers with game modes, maps, and player counts."),
+    ("/weapon", "🔫 View Weapons", "Explore different weapon categories."),
+    ("/vehicle", "🚗 View Vehicle Information", "Discover vehicle categories, check damage values, and **see which maps each vehicle is available on**!"),
+    ("/ranks", "🏆 View Ranks", "See all the available ranks based on your Kills ELO, and check what rank you are in the game!")
+]
+
+# The embeds below never change, so they are built once at import and only ever sent, never modified
+
+def build_help_embed():
+    embed = discord.Embed(
+        title="💡 Help Command Center! 💡",
+        description="Check out these epic commands you can unleash in the game! 🚀",
+        color=0x3498db
+    )
+    embed.set_thumbnail(url="https://i.imgur.com/Rt6nDrT.png")
+    for name, description, details in HELP_COMMANDS:
+        embed.add_field(name=name, value=f"{description}\n{details}", inline=False)
+    embed.set_footer(text="WBStats | Inspired by SquadBot and POMP's Mod")
+    return embed
+
+def build_custom_pfp_embed():
+    embed = discord.Embed(
+        title="🖼️ Setting Up Your Custom Profile Picture",
+        description="Follow these steps to set up your custom profile picture using Imgur:",
+        color=0x3498db
+    )
+    embed.add_field(
+        name="Step 1: Upload Your Image",
+        value="Upload your desired profile picture to [Imgur](https://imgur.com/upload).",
+        inline=False
+    )
+    embed.add_field(
+        name="Step 2: Get the Image Link",
+        value="After uploading, right-click on the image and select 'Copy image address'.",
+        inline=False
+    )
+    embed.add_field(
+        name="Step 3: Link Your Stats with Custom PFP",
+        value="Use the `/linkstats` command with your War Brokers ID and the Imgur link:\n`/linkstats id: pfpimgurlink:`",
+        inline=False
+    )
+    embed.add_field(
+        name="Example",
+        value="`/linkstats id:123456 pfpimgurlink:https://i.imgur.com/abcdefg.png`",
+        inline=False
+    )
+    embed.set_footer(text="Note: Make sure to use a direct image link from Imgur (ending with .jpg, .png, etc.)")
+    return embed
+
+HELP_EMBED = build_help_embed()
+CUSTOM_PFP_EMBED = build_custom_pfp_embed()
+
+
 class CustomPFPButton(discord.ui.Button):
     def __init__(self):
         super().__init__(style=discord.ButtonStyle.primary, label="Custom PFP")
 
     async def callback(self, interaction: discord.Interaction):
         try:
-            custom_pfp_embed = discord.Embed(
-                title="🖼️ Setting Up Your Custom Profile Picture",
-                description="Follow these steps to set up your custom profile picture using Imgur:",
-                color=0x3498db
-            )
-            custom_pfp_embed.add_field(
-                name="Step 1: Upload Your Image",
-                value="Upload your desired profile picture to [Imgur](https://imgur.com/upload).",
-                inline=False
-            )
-            custom_pfp_embed.add_field(
-                name="Step 2: Get the Image Link",
-                value="After uploading, right-click on the image and select 'Copy image address'.",
-                inline=False
-            )
-            custom_pfp_embed.add_field(
-                name="Step 3: Link Your Stats with Custom PFP",
-                value="Use the `/linkstats` command with your War Brokers ID and the Imgur link:\n`/linkstats id: pfpimgurlink:`",
-                inline=False
-            )
-            custom_pfp_embed.add_field(
-                name="Example",
-                value="`/linkstats id:123456 pfpimgurlink:https://i.imgur.com/abcdefg.png`",
-                inline=False
-            )
-            custom_pfp_embed.set_footer(text="Note: Make sure to use a direct image link from Imgur (ending with .jpg, .png, etc.)")
-
             # Create a view with the HelpButton to return to the help embed
             view = discord.ui.View()
             view.add_item(HelpButton())  # Add the HelpButton to the view
 
-            await interaction.response.edit_message(embed=custom_pfp_embed, view=view)
+            await interaction.response.edit_message(embed=CUSTOM_PFP_EMBED, view=view)
         except Exception as e:
             print(f"Error in CustomPFPButton callback: {e}")
             await interaction.response.send_message("Something went wrong while setting up your custom PFP. Please try again.", ephemeral=True)
@@ -567,78 +718,12 @@ class HelpButton(discord.ui.Button):
 
     async def callback(self, interaction: discord.Interaction):
         try:
-            help_embed = discord.Embed(
-                title="💡 Help Command Center! 💡",
-                description="Check out these epic commands you can unleash in the game! 🚀",
-                color=0x3498db
-            )
-            help_embed.set_thumbnail(url="https://i.imgur.com/Rt6nDrT.png")
-
-            commands = [
-                {
-                    "name": "/stats",
-                    "description": "🛡️ Show your stats",
-                    "details": "Want to flex your stats? This command's got your back! Plus, you can now check your daily rankings."
-                },
-                {
-                    "name": "/linkstats",
-                    "description": "🔗 Link your stats",
-                    "details": "Tired of typing your ID every time? Link your stats and save the hassle!"
-                },
-                {
-                    "name": "/statsof",
-                    "description": "📜 Show stats of any player",
-                    "details": "Curious about another player? Enter their stats ID and check them out!"
-                },
-                {
-                    "name": "/expinfo",
-                    "description": "📈 XP Breakdown",
-                    "details": "Ever wondered how to get that next level up? This command breaks it down for you!"
-                },
-                {
-                    "name": "/squad",
-                    "description": "📊 Squad Stats",
-                    "details": "Get the average Kills ELO, Games ELO, and game mode wins for your squad."
-                },
-                {
-                    "name": "/findmatch",
-                    "description": "🔍 Find Matches",
-                    "details": "Looking for a match? This command will list active servers with game modes, maps, and player counts."
-                },
-                {
-                    "name": "/weapon",
-                    "description": "🔫 View Weapons",
-                    "details": "Explore different weapon categories."
-                },
-                {
-                    "name": "/vehicle",
-                    "description": "🚗 View Vehicle Information",
-                    "details": "Discover vehicle categories, check damage values, and **see which maps each vehicle is available on**!"
-                },
-                {
-                    "name": "/ranks",
-                    "description": "🏆 View Ranks",
-                    "details": "See all the available ranks based on your Kills ELO, and check what rank you are in the game!"
-                }
-            ]
-
-
-
-            for command in commands:
-                help_embed.add_field(
-                    name=command["name"],
-                    value=f"{command['description']}\n{command['details']}",
-                    inline=False
-                )
-
-            help_embed.set_footer(text="WBStats | Inspired by SquadBot and POMP's Mod")
-
             # Create the view with buttons for CustomPFPButton and the Support Server link
             view = discord.ui.View()
             view.add_item(CustomPFPButton())
             view.add_item(discord.ui.Button(label="Support Server", url="https://discord.com/invite/WehCXEJGCQ"))
 
-            await interaction.response.edit_message(embed=help_embed, view=view)
+            await interaction.response.edit_message(embed=HELP_EMBED, view=view)
         except Exception as e:
             print(f"Error in HelpButton callback: {e}")
             await interaction.response.send_message("Something went wrong while returning to help. Please try again.", ephemeral=True)
@@ -651,158 +736,185 @@ class HelpButton(discord.ui.Button):
 async def help_command(ctx: discord.Interaction):
     await ctx.response.defer()  # Defer the response to prevent the command from timing out
 
-    embed = discord.Embed(
-        title="💡 Help Command Center! 💡",
-        description="Check out these epic commands you can unleash in the game! 🚀",
-        color=0x3498db
-    )
-    embed.set_thumbnail(url="https://i.imgur.com/Rt6nDrT.png")
-
-    commands = [
-        {
-            "name": "/stats",
-            "description": "🛡️ Show your stats",
-            "details": "Want to flex your stats? This command's got your back! Plus, you can now check your daily rankings."
-        },
-        {
-            "name": "/linkstats",
-            "description": "🔗 Link your stats",
-            "details": "Tired of typing your ID every time? Link your stats and save the hassle!"
-        },
-        {
-            "name": "/statsof",
-            "description": "📜 Show stats of any player",
-            "details": "Curious about another player? Enter their stats ID and check them out!"
-        },
-        {
-            "name": "/expinfo",
-            "description": "📈 XP Breakdown",
-            "details": "Ever wondered how to get that next level up? This command breaks it down for you!"
-        },
-        {
-            "name": "/squad",
-            "description": "📊 Squad Stats",
-            "details": "Get the average Kills ELO, Games ELO, and game mode wins for your squad."
-        },
-        {
-            "name": "/findmatch",
-            "description": "🔍 Find Matches",
-            "details": "Looking for a match? This command will list active servers with game modes, maps, and player counts."
-        },
-        {
-            "name": "/weapon",
-            "description": "🔫 View Weapons",
-            "details": "Explore different weapon categories."
-        },
-        {
-            "name": "/vehicle",
-            "description": "🚗 View Vehicle Information",
-            "details": "Discover vehicle categories, check damage values, and **see which maps each vehicle is available on**!"
-        },
-        {
-            "name": "/ranks",
-            "description": "🏆 View Ranks",
-            "details": "See all the available ranks based on your Kills ELO, and check what rank you are in the game!"
-        }
-    ]
-
-
-
-    for command in commands:
-        embed.add_field(
-            name=command["name"],
-            value=f"{command['description']}\n{command['details']}",
-            inline=False
-        )
-
-    embed.set_footer(text="WBStats | Inspired by SquadBot and POMP's Mod")
-
     # Create the view with the CustomPFPButton and HelpButton
     view = discord.ui.View()
     view.add_item(CustomPFPButton())
     view.add_item(discord.ui.Button(label="Support Server", url="https://discord.gg/7BgVryKcCz"))
 
     # Send the embed with the interactive buttons
-    await ctx.followup.send(embed=embed, view=view)
-@bot.tree.command(name='expinfo',
-                  description='Show how to rack up some sweet XP')
-async def expinfo(ctx: discord.Interaction):
+    await ctx.followup.send(embed=HELP_EMBED, view=view)
+
+# XP rewards shown by /expinfo, as (XP, what earns it)
+XP_REWARDS = [
+    ("20 XP", "Assist a teammate."),
+    ("40 XP", "Eliminate an enemy."),
+    ("60 XP", "Achieve a 2 Kill Streak."),
+    ("80 XP", "Achieve a 3 Kill Streak."),
+    ("100 XP", "Achieve a 4 Kill Streak."),
+    ("120 XP", "Achieve a 5 Kill Streak."),
+    ("140 XP", "Achieve a 6 Kill Streak."),
+    ("160 XP", "Achieve a 7 Kill Streak."),
+    ("180 XP", "Achieve an 8 Kill Streak."),
+    ("200 XP", "Achieve 9 or more Kill Streaks."),
+    ("50 XP", "Complete an objective."),
+    ("50 XP", "Complete a mission."),
+    ("5 XP", "Survive for 25 seconds."),
+    ("80 XP", "Finish as the top player on the leaderboard."),
+    ("300 XP", "Receive a consolation prize for losing."),
+    ("500 XP", "Win the match.")
+]
+
+def build_expinfo_embed():
     embed = discord.Embed(
         title="Experience Points Guide",
         description="Here's how to earn XP effectively:",
         color=0xF39C12)
     embed.set_thumbnail(url="https://i.imgur.com/Rt6nDrT.png")
+    for xp, action in XP_REWARDS:
+        embed.add_field(name=xp, value=action, inline=True)
+    embed.set_footer(text="WBStats | Inspired by SquadBot and POMP's Mod")
+    return embed
+
+EXPINFO_EMBED = build_expinfo_embed()
+
+@bot.tree.command(name='expinfo',
+                  description='Show how to rack up some sweet XP')
+async def expinfo(ctx: discord.Interaction):
+    await ctx.response.send_message(embed=EXPINFO_EMBED)
+# Function to read one member's kills and deaths, reusing the stored numbers if they have not played since
+async def scan_member(member, stored):
+    uid = member.get("uid")
+
+    # getSquadMembers entries share getPlayer's shape, so use whatever they already carry
+    fields = parsers.parse_player_api(member)
+    if "last_seen" not in fields:
+        api_fields = await sources.fetch_player_api(uid)
+        fields = {**(api_fields or {}), **fields}
+    last_seen = fields.get("last_seen")
+
+    previous = stored.get(uid)
+    if previous and last_seen is not None and previous.get("time") is not None and last_seen <= previous["time"]:
+        return previous
+
+    if "kills" in fields and "deaths" in fields:
+        return {"time": last_seen, "kills": fields["kills"], "deaths": fields["deaths"]}
+
+    # Only now fall back to the profile page, sharing any fetch already in flight for the same uid
+    kills_deaths = await member_flights.do(uid, sources.fetch_kills_deaths, uid)
+    if kills_deaths is None:
+        return None
+    return {"time": last_seen, "kills": kills_deaths[0], "deaths": kills_deaths[1]}
+
+# Function to scan members with a bounded pool of workers, adding each result to the squad as it arrives
+async def scan_squad_members(squad_snapshot, members, stored):
+    queue = asyncio.Queue()
+    for member in members:
+        queue.put_nowait(member)
+    scanned = {}
+
+    async def worker():
+        while not queue.empty():
+            member = queue.get_nowait()
+            try:
+                entry = await scan_member(member, stored)
+            except Exception as e:
+                print(f"Error fetching squad member {member.get('uid')}: {e}")
+                entry = None
+            if entry is None:
+                squad_snapshot.add_member_stats(0, 0)
+            else:
+                scanned[member.get("uid")] = entry
+                squad_snapshot.add_member_stats(entry["kills"], entry["deaths"])
+
+    workers = min(SQUAD_CONCURRENCY, len(members))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return scanned
+
+# Function to collect everything /squad shows for a tag into a snapshot
+async def collect_squad(tag):
+    # Fetch squad data from the API
+    api_status, squad_members = await sources.fetch_squad_members(tag)
+    if api_status != 200:
+        return None
+    if not squad_members:
+        return SquadSnapshot(tag)
+
+    # Running totals are published so every /squad waiting on this tag can show them
+    squad_snapshot = parsers.build_squad(tag, squad_members)
+    squad_progress[tag] = squad_snapshot
+    try:
+        stored = squad_data.get(tag, {}).get("members", {})
+        game_wins, scanned = await asyncio.gather(
+            sources.fetch_squad_wins(tag),
+            scan_squad_members(squad_snapshot, squad_members, stored)
+        )
+        squad_snapshot.game_wins = game_wins
+    finally:
+        squad_progress.pop(tag, None)
 
-    embed.add_field(name="20 XP",
-                    value="Assist a teammate.",
-                    inline=True)
-    embed.add_field(name="40 XP",
-                    value="Eliminate an enemy.",
-                    inline=True)
-    embed.add_field(name="60 XP",
-                    value="Achieve a 2 Kill Streak.",
-                    inline=True)
-    embed.add_field(name="80 XP",
-                    value="Achieve a 3 Kill Streak.",
-                    inline=True)
-    embed.add_field(name="100 XP",
-                    value="Achieve a 4 Kill Streak.",
-                    inline=True)
-    embed.add_field(name="120 XP",
-                    value="Achieve a 5 Kill Streak.",
-                    inline=True)
-    embed.add_field(name="140 XP",
-                    value="Achieve a 6 Kill Streak.",
-                    inline=True)
-    embed.add_field(name="160 XP",
-                    value="Achieve a 7 Kill Streak.",
-                    inline=True)
-    embed.add_field(name="180 XP",
-                    value="Achieve an 8 Kill Streak.",
-                    inline=True)
-    embed.add_field(name="200 XP",
-                    value="Achieve 9 or more Kill Streaks.",
-                    inline=True)
-
-    embed.add_field(name="50 XP",
-                    value="Complete an objective.",
-                    inline=True)
-    embed.add_field(name="50 XP",
-                    value="Complete a mission.",
-                    inline=True)
-    embed.add_field(name="5 XP",
-                    value="Survive for 25 seconds.",
-                    inline=True)
-    embed.add_field(name="80 XP",
-                    value="Finish as the top player on the leaderboard.",
-                    inline=True)
-    embed.add_field(name="300 XP",
-                    value="Receive a consolation prize for losing.",
-                    inline=True)
-    embed.add_field(name="500 XP",
-                    value="Win the match.",
-                    inline=True)
+    # Only current members are kept, so anyone who left the squad drops out
+    squad_data[tag] = {"updated": int(squad_snapshot.fetched_at), "members": scanned}
+    squad_persister.mark_dirty()
+
+    return squad_snapshot
+
+# Function to format a squad snapshot as an embed, partial snapshots show the scan progress
+def build_squad_stats(squad_snapshot):
+    tag = squad_snapshot.tag
+
+    if squad_snapshot.complete:
+        description = "Here's a detailed look at the squad stats."
+    else:
+        description = f"⏳ Scanning members... **{squad_snapshot.scanned}/{squad_snapshot.count}** done. Totals update as they come in."
+
+    squad_embed = discord.Embed(
+        title=f"🏆 Squad Stats for {tag} 🏆",
+        description=description,
+        color=0x3498db
+    )
+    squad_embed.add_field(name="Squad Members", value=f"{squad_snapshot.count}", inline=True)
+    squad_embed.add_field(name="Squad Level", value=f"{squad_snapshot.level}", inline=True)
+    squad_embed.add_field(name="\u200B",
+          value="\u200B",
+          inline=True)
+    squad_embed.add_field(name="Total Squad Kills", value=f"{squad_snapshot.kills:,}", inline=True)
+    squad_embed.add_field(name="Total Squad Deaths", value=f"{squad_snapshot.deaths:,}", inline=True)
+    squad_embed.add_field(name="Overall Squad KD", value=f"{squad_snapshot.kd:.2f}", inline=True)
+    squad_embed.add_field(name="Average Kills ELO", value=f"{squad_snapshot.avg_kills_elo:.2f}", inline=True)
+    squad_embed.add_field(name="Average Games ELO", value=f"{squad_snapshot.avg_games_elo:.2f}", inline=True)
+    squad_embed.set_thumbnail(
+        url="https://i.imgur.com/Rt6nDrT.png")
+
+    squad_embed.set_footer(text="WBStats | Inspired by SquadBot and POMP's Mod")
+
+    # Add game mode wins
+    for mode, wins in (squad_snapshot.game_wins or {}).items():
+        squad_embed.add_field(name=f"{mode} Wins", value=wins, inline=False)
 
     view = View()
 
+    squad_stats = Button(
+        label=f"{tag}",
+        url=f"https://stats.warbrokers.io/squads/{tag}"
+    )
+    view.add_item(squad_stats)
+
     support_button = Button(
         label="Support Server",
-        url="https://discord.com/invite/WehCXEJGCQ"
+        url="https://discord.gg/7BgVryKcCz"
     )
-
-
     view.add_item(support_button)
 
+    return squad_embed, view
 
-    embed.set_footer(text="WBStats | Inspired by SquadBot and POMP's Mod")
-
-    await ctx.response.send_message(embed=embed)
 @bot.tree.command(name='squad', description='📊 Get the average Kills ELO and Games ELO of a squad along with game mode wins.')
 async def squad(ctx: discord.Interaction, tag: str):
+    # Followups and edits go through the send queue, so a rate limited one is retried on its own
+    route = interaction_route(ctx)
     try:
         # Create an embed for the loading message
         loading_embed = discord.Embed(
-            description="Hold tight! I'm digging up your stats right now... This might take around **38 to 60 seconds**.\nNeed a hand? Use `/help` for assistance.",
+            description="Hold tight! I'm digging up your stats right now... Live totals will show up in a few seconds.\nNeed a hand? Use `/help` for assistance.",
             color=0x3498db
         )
         loading_embed.set_image(url="https://i.imgur.com/wu7kNPr.gif")
@@ -810,173 +922,72 @@ async def squad(ctx: discord.Interaction, tag: str):
         # Send the embed instead of a plain message
         await ctx.response.send_message(embed=loading_embed, ephemeral=True)
 
-        async with aiohttp.ClientSession() as session:
-            # Fetch squad data from the API
-            api_url = f"https://wbapi.wbpjs.com/squad/getSquadMembers?squadName={tag}"
-            async with session.get(api_url) as api_response:
-                if api_response.status == 200:
-                    squad_members = await api_response.json()
-
-                    if not squad_members:
-                        await ctx.followup.send(f"No stats found for squad tag `{tag}`. Please note that squad tags are case-sensitive. Try again!", ephemeral=True)
-                        return
-
-                    # Initialize accumulators
-                    total_kills = 0
-                    total_deaths = 0
-                    total_kills_elo = 0
-                    total_games_elo = 0
-                    total_level = 0
-                    count = len(squad_members)
-
-                    # Concurrently fetch player stats using asyncio.gather
-                    async def fetch_player_stats(uid):
-                        player_url = f"https://stats.warbrokers.io/players/i/{uid}"
-                        async with session.get(player_url) as player_response:
-                            if player_response.status == 200:
-                                player_soup = BeautifulSoup(await player_response.text(), 'html.parser')
-                                player_data = {}
-
-                                # Extract data based on headers and values
-                                header_elements = player_soup.find_all("div", class_="player-details-number-box-header")
-                                value_elements = player_soup.find_all("div", class_="player-details-number-box-value")
-
-                                for header, value in zip(header_elements, value_elements):
-                                    header_text = header.text.strip()
-                                    value_text = value.text.strip().replace(',', '')  # Remove commas from numbers
-
-                                    # Handle Kills and Deaths as integers, and K/D as a float
-                                    
-                                    if header_text in ['Kills', 'Deaths']:
-                                        player_data[header_text] = int(value_text)  # Convert to int
-                                    elif header_text == 'Kills / Death':  # Handle K/D ratio
-                                        player_data[header_text] = float(value_text)  # Convert to float
-
-                                # Return kills and deaths
-                                return player_data.get('Kills', 0), player_data.get('Deaths', 0)
-                            else:
-                                return 0, 0
-
-                    # Fetch all player stats concurrently
-                    tasks = [fetch_player_stats(member.get("uid")) for member in squad_members]
-                    player_stats = await asyncio.gather(*tasks)
-
-                    # Process player stats
-                    for (kills, deaths), member in zip(player_stats, squad_members):
-                        total_kills_elo += member.get("killsELO", 0)
-                        total_games_elo += member.get("gamesELO", 0)
-                        total_level += member.get("level", 0)
-                        total_kills += kills
-                        total_deaths += deaths
-
-                    # Calculate average ELOs and KD ratio
-                    avg_kills_elo = total_kills_elo / count
-                    avg_games_elo = total_games_elo / count
-                    overall_kd = total_kills / total_deaths if total_deaths > 0 else 0
-
-                    # Fetch game mode wins from HTML
-                    html_url = f"https://stats.warbrokers.io/squads/{tag}"
-                    async with session.get(html_url) as html_response:
-                        if html_response.status == 200:
-                            soup = BeautifulSoup(await html_response.text(), 'html.parser')
-
-                            # Extract stats from HTML
-                            game_wins = {
-                                "Death Match": soup.find('div', string=lambda text: text and 'Death Match' in text).find_next_sibling('div').string.strip(),
-                                "Battle Royale": soup.find('div', string=lambda text: text and 'Battle Royale' in text).find_next_sibling('div').string.strip(),
-                                "Missile Launch": soup.find('div', string=lambda text: text and 'Missile Launch' in text).find_next_sibling('div').string.strip(),
-                                "Vehicle Escort": soup.find('div', string=lambda text: text and 'Vehicle Escort' in text).find_next_sibling('div').string.strip(),
-                                "Capture Point": soup.find('div', string=lambda text: text and 'Capture Point' in text).find_next_sibling('div').string.strip(),
-                                "Package Drop": soup.find('div', string=lambda text: text and 'Package Drop' in text).find_next_sibling('div').string.strip(),
-                                "Zombie BR": soup.find('div', string=lambda text: text and 'Zombie BR' in text).find_next_sibling('div').string.strip()
-                            }
-
-                            # Create the embed
-                            num_members = count  # Number of members in the squad
-
-                            squad_embed = discord.Embed(
-                                title=f"🏆 Squad Stats for {tag} 🏆",
-                                description="Here's a detailed look at the squad stats.",
-                                color=0x3498db
-                            )
-                            squad_embed.add_field(name="Squad Members", value=f"{num_members}", inline=True)
-                            squad_embed.add_field(name="Squad Level", value=f"{total_level}", inline=True)
-                            squad_embed.add_field(name="\u200B",
-                                  value="\u200B",
-                                  inline=True)
-                            squad_embed.add_field(name="Total Squad Kills", value=f"{total_kills:,}", inline=True)
-                            squad_embed.add_field(name="Total Squad Deaths", value=f"{total_deaths:,}", inline=True)
-                            squad_embed.add_field(name="Overall Squad KD", value=f"{overall_kd:.2f}", inline=True)
-                            squad_embed.add_field(name="Average Kills ELO", value=f"{avg_kills_elo:.2f}", inline=True)
-                            squad_embed.add_field(name="Average Games ELO", value=f"{avg_games_elo:.2f}", inline=True)
-                            squad_embed.set_thumbnail(
-                                url="https://i.imgur.com/Rt6nDrT.png")
-
-                            squad_embed.set_footer(text="WBStats | Inspired by SquadBot and POMP's Mod")
-
-
-
-
-                            # Add game mode wins
-                            for mode, wins in game_wins.items():
-                                squad_embed.add_field(name=f"{mode} Wins", value=wins, inline=False)
-
-                            view = View()
-
-                            squad_stats = Button(
-                                label=f"{tag}",
-                                url=f"https://stats.warbrokers.io/squads/{tag}"
-                            )
-                            view.add_item(squad_stats)
-
-                            support_button = Button(
-                                label="Support Server",
-                                url="https://discord.gg/7BgVryKcCz"
-                            )
-                            view.add_item(support_button)
-
-                            # Send the message with embed
-                            await ctx.followup.send(embed=squad_embed, view=view)  
-
-                        else:
-                            await ctx.followup.send("Failed to retrieve game mode wins from the HTML page.", ephemeral=True)
-
-                else:
-                    await ctx.followup.send("No stats found. Please note that squad tags are case-sensitive. Try again!", ephemeral=True)
+        # Several people asking for the same tag at once share one collection
+        collection = asyncio.ensure_future(squad_flights.do(tag, collect_squad, tag))
+
+        # Post the running totals and keep editing them until every member is scanned
+        message = None
+        while not collection.done():
+            await asyncio.wait({collection}, timeout=SQUAD_PROGRESS_INTERVAL)
+            partial = squad_progress.get(tag)
+            if collection.done() or partial is None:
+                continue
+            progress_embed, _ = build_squad_stats(partial)
+            if message is None:
+                message = await send_queue.send(route, lambda: ctx.followup.send(embed=progress_embed, wait=True))
+            else:
+                # Not awaited: a newer edit replaces this one if it is still waiting
+                send_queue.submit(route, lambda embed=progress_embed: message.edit(embed=embed), key=message.id)
+
+        squad_snapshot = collection.result()
 
-    except discord.errors.HTTPException as e:
-        if e.status == 429:
-            await asyncio.sleep(10)  # Wait for 10 seconds before retrying
-            await squad(ctx, tag)  # Retry the command
+        if squad_snapshot is None:
+            await send_queue.send(route, lambda: ctx.followup.send("No stats found. Please note that squad tags are case-sensitive. Try again!", ephemeral=True))
+        elif not squad_snapshot.count:
+            await send_queue.send(route, lambda: ctx.followup.send(f"No stats found for squad tag `{tag}`. Please note that squad tags are case-sensitive. Try again!", ephemeral=True))
         else:
-            print(f"HTTPException: {e}")
-            await ctx.followup.send("Something went wrong while fetching squad data.", ephemeral=True)
+            squad_embed, view = build_squad_stats(squad_snapshot)
+
+            # Turn the progress message into the final result, or send it if the scan was quick
+            if message is None:
+                await send_queue.send(route, lambda: ctx.followup.send(embed=squad_embed, view=view))
+            else:
+                await send_queue.send(route, lambda: message.edit(embed=squad_embed, view=view), key=message.id)
+
+            if squad_snapshot.game_wins is None:
+                reason = "is unavailable right now" if not http_client.is_available(sources.SQUAD_PAGE_URL) else "could not be read"
+                await send_queue.send(route, lambda: ctx.followup.send(f"Failed to retrieve game mode wins: {sources.host_of(sources.SQUAD_PAGE_URL)} {reason}.", ephemeral=True))
+
+    except (sources.SourcesUnavailable, *sources.UNAVAILABLE_ERRORS) as e:
+        # The squad API is down, say so right away instead of a generic error
+        print(f"Squad sources unavailable: {e!r}")
+        send_queue.submit(route, lambda: ctx.followup.send(f"⚠️ {sources.host_of(sources.API_URL)} can't be reached right now, so squad stats are unavailable. Please try again in a few minutes.", ephemeral=True))
+    except discord.errors.HTTPException as e:
+        # Rate limits were already retried by the send queue, nothing is collected again
+        print(f"HTTPException: {e}")
+        send_queue.submit(route, lambda: ctx.followup.send("Something went wrong while fetching squad data.", ephemeral=True))
     except Exception as e:
         print(f"Unexpected error: {e}")
-        await ctx.followup.send("Unexpected error occur, Try again later after few minutes", ephemeral=True)
+        send_queue.submit(route, lambda: ctx.followup.send("Unexpected error occur, Try again later after few minutes", ephemeral=True))
 
 
-Modes = {
-    "tdm": 128, "ml": 138, "bd": 275, "cp": 135, "ve": 136, "gg": 15,
-}
-Modes_long = {
-    "Team Death Match": 128, "Missile Launch": 138, "Bomb Disposal": 275,
-    "Capture Points": 135, "Vehicle Escort": 136, "Gun Game": 15,
-}
-Maps = {
-    "area15base": 21, "area15bunker": 22, "citypoint": 13, "cologne": 44,
-    "desert": 0, "escape": 6, "flooded": 4, "frontier": 31, "goldmine": 47,
-    "heist": 32, "kitchen": 29, "moonbase": 20, "northwest": 1, "office": 3,
-    "pacific": 2, "remagen": 8, "siege": 39, "skullisland": 24, "southwest": 7,
-    "spacestation": 38, "temple": 5, "thesomme": 15, "tomb": 14, "tribute": 18,
-    "tribute(cyberpunk)": 19, "cyberpunk": 19, "zengarden": 43, "containers": 37,
-    "crisscross": 40, "dwarfsdungeon": 28, "dwarf'sdungeon": 28, "dwarfdungeon": 28,
-    "hanger": 25, "pyramid": 36, "quarry": 27, "sniperalley": 35, "snipersonly": 41,
-    "threelane": 34, "towerofpower": 33,
-}
+# Every region's server list is polled in the background; /findmatch only reads the index
+server_poller = ServerPoller(
+    catalog.CLASSIC_REGIONS + catalog.FOURVFOUR_REGIONS,
+    interval=float(os.getenv('SERVER_POLL_INTERVAL', 30)),
+    timeout=float(os.getenv('REGION_TIMEOUT', 5))
+)
+
+async def mode_autocomplete(ctx: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    return [app_commands.Choice(name=name, value=value) for name, value in catalog.MODE_SEARCH.complete(current)]
 
-classic = ["USA", "USA_WEST", "ASIA", "JAPAN", "EUROPE", "INDIA", "AUSTRALIA", "RUSSIA"]
-fourvfour = ["USA_4V4", "EU_4V4", "ASIA_4V4"]
+async def map_autocomplete(ctx: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    return [app_commands.Choice(name=name, value=value) for name, value in catalog.MAP_SEARCH.complete(current)]
+
+async def region_autocomplete(ctx: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    # Only offer the regions of the game picked so far
+    search = catalog.REGION_SEARCH.get(getattr(ctx.namespace, 'game', None), catalog.REGION_SEARCH[None])
+    return [app_commands.Choice(name=name, value=value) for name, value in search.complete(current)]
 
 @bot.tree.command(
     name='findmatch',
@@ -990,6 +1001,7 @@ fourvfour = ["USA_4V4", "EU_4V4", "ASIA_4V4"]
     app_commands.Choice(name="Greater than or equal to", value="G"),
     app_commands.Choice(name="Less than or equal to", value="L")
 ])
+@app_commands.autocomplete(mode=mode_autocomplete, map=map_autocomplete, region=region_autocomplete)
 async def findmatch(
     ctx: discord.Interaction,
     game: app_commands.Choice[str],
@@ -1001,15 +1013,18 @@ async def findmatch(
 ):
     await ctx.response.defer()
 
-    settings = set_data(game.value, [player_comparison.value == "G", player_count], mode, map, region)
+    settings, problems = set_data(game.value, [player_comparison.value == "G", player_count], mode, map, region)
+    if problems:
+        await ctx.followup.send("\n".join(problems))
+        return
     matches = await game_check(settings)
 
     embed = discord.Embed(title="🎮 War Brokers Match Finder", color=0x3498db)
     embed.add_field(name="🏆 Game", value=game.name, inline=True)
     embed.add_field(name="👥 Players", value=f"{'≥' if player_comparison.value == 'G' else '≤'}{player_count}", inline=True)
-    embed.add_field(name="🎯 Mode", value=mode.upper() if mode else "Any", inline=True)
-    embed.add_field(name="🗺️ Map", value=map.capitalize() if map else "Any", inline=True)
-    embed.add_field(name="🌍 Region", value=region.upper() if region else "Any", inline=True)
+    embed.add_field(name="🎯 Mode", value=catalog.mode_name(settings[2][0]) if mode else "Any", inline=True)
+    embed.add_field(name="🗺️ Map", value=catalog.map_name(settings[3][0]) if map else "Any", inline=True)
+    embed.add_field(name="🌍 Region", value=settings[4][0] if region else "Any", inline=True)
 
     if matches:
         embed.description = f"Found {len(matches)} match{'es' if len(matches) > 1 else ''}! 🎉"
@@ -1027,74 +1042,61 @@ async def findmatch(
 
     await ctx.followup.send(embed=embed)
 
+def lookup_or_report(kind, name, index, problems):
+    """Resolve name through a catalog index, noting a problem with close suggestions when it is unknown."""
+    value = index.get(catalog.normalize(name))
+    if value is None:
+        suggestions = catalog.suggest(name, index)
+        hint = f" Did you mean {', '.join(suggestions)}?" if suggestions else ""
+        problems.append(f"❌ Unknown {kind} '{name}'.{hint}")
+    return value
+
 def set_data(game, players, mode, map, location):
+    """Search settings for game_check plus a list of problems with the given names.
+
+    A misspelled mode, map or region is reported instead of being widened to "all".
+    """
     data = [game.lower(), players]
+    problems = []
+    game_regions = catalog.game_regions(game.lower())
 
-    if mode:
-        data.append([Modes[mode.lower()]] if mode.lower() in Modes else "all")
-    else:
-        data.append("all")
+    mode_id = lookup_or_report("mode", mode, catalog.MODE_IDS, problems) if mode else None
+    data.append([mode_id] if mode_id is not None else "all")
 
-    if map:
-        data.append([Maps[map.lower()]] if map.lower() in Maps else "all")
-    else:
-        data.append("all")
+    map_id = lookup_or_report("map", map, catalog.MAP_IDS, problems) if map else None
+    data.append([map_id] if map_id is not None else "all")
 
     if location:
-        game_regions = classic if game.lower() == "classic" else fourvfour
-        data.append([location.upper()] if location.upper() in game_regions else game_regions)
+        game_region_ids = {catalog.normalize(region): region for region in game_regions}
+        found = lookup_or_report("region", location, game_region_ids, problems)
+        data.append([found] if found else list(game_regions))
     else:
-        data.append(classic if game.lower() == "classic" else fourvfour)
+        data.append(list(game_regions))
 
-    return data
-
-async def get_server_data(region):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f'https://store2.warbrokers.io/293//server_list.php?location={region}') as response:
-            text = await response.text()
-            return text.split(f",{region},")
+    return data, problems
 
 async def game_check(set_data):
-    matches = []
-    for region in set_data[4]:
-        server_data = await get_server_data(region)
-        for i, server in enumerate(server_data[1:], 1):
-            data = server.split(",")
-            if check_server(set_data, data):
-                matches.append({
-                    'location': region,
-                    'mode': get_mode_name(int(data[1])),
-                    'map': get_map_name(int(data[3])),
-                    'players': int(data[2])
-                })
-    return matches
-
-def check_server(set_data, server_data):
-    players = int(server_data[2])
-    mode = int(server_data[1])
-    map = int(server_data[3])
-
-    if players == 0:
-        return False
-
-    if set_data[1][0] and players < set_data[1][1]:
-        return False
-    if not set_data[1][0] and players > set_data[1][1]:
-        return False
-
-    if set_data[2] != "all" and mode not in set_data[2]:
-        return False
-
-    if set_data[3] != "all" and map not in set_data[3]:
-        return False
-
-    return True
-
-def get_mode_name(mode_id):
-    return next((name for name, id in Modes_long.items() if id == mode_id), "Unknown")
-
-def get_map_name(map_id):
-    return next((name for name, id in Maps.items() if id == map_id), "Unknown").capitalize()
+    # Served from the poller's index, only the very first search waits for a poll
+    if not server_poller.ready:
+        await server_poller.refresh()
+
+    wants_more, player_count = set_data[1]
+    servers = server_poller.index.query(
+        set_data[4],
+        modes=None if set_data[2] == "all" else set_data[2],
+        maps=None if set_data[3] == "all" else set_data[3],
+        min_players=player_count if wants_more else None,
+        max_players=None if wants_more else player_count
+    )
+    return [
+        {
+            'location': region,
+            'mode': catalog.mode_name(mode),
+            'map': catalog.map_name(map_id),
+            'players': players
+        }
+        for region, mode, map_id, players in servers
+    ]
 
 # Weapon categories and images
 WEAPON_CATEGORIES = {
@@ -1194,6 +1196,31 @@ WEAPON_WIKI_LINKS = {
     "Laser Trip Mine": "https://war-brokers.fandom.com/wiki/Laser_Trip_Mine"
 }
 
+def build_weapon_categories_embed():
+    embed = discord.Embed(
+        title="🔫 Weapon Categories", 
+        description="Select a category below to view the available weapons.",
+        color=discord.Color.blue()
+    )
+
+    # Loop through categories and add fields to the embed
+    for category, weapons in WEAPON_CATEGORIES.items():
+        emoji = CATEGORY_EMOJIS.get(category, "")
+        embed.add_field(name=f"{emoji} {category}", value=f"View {category} weapons", inline=False)
+
+    embed.set_footer(text="📄 For the latest updates, visit the War Brokers Wiki.")
+    embed.set_thumbnail(url="https://i.imgur.com/Rt6nDrT.png")
+    return embed
+
+def build_weapon_embed(weapon):
+    embed = discord.Embed(title=weapon, color=discord.Color.green())
+    embed.set_image(url=WEAPON_IMAGES.get(weapon, ""))
+    embed.set_footer(text="📄 For the latest updates, visit the War Brokers Wiki.")
+    return embed
+
+WEAPON_CATEGORIES_EMBED = build_weapon_categories_embed()
+WEAPON_EMBEDS = {weapon: build_weapon_embed(weapon) for weapons in WEAPON_CATEGORIES.values() for weapon in weapons}
+
 class WeaponInfoView(discord.ui.View):
     def __init__(self, weapons: List[str], category: str, emoji: str):
         super().__init__(timeout=None)
@@ -1239,9 +1266,7 @@ class WeaponInfoView(discord.ui.View):
             self.current_page += 1
         elif custom_id.startswith("weapon_"):
             weapon = custom_id[7:]
-            weapon_embed = discord.Embed(title=weapon, color=discord.Color.green())
-            weapon_embed.set_image(url=WEAPON_IMAGES.get(weapon, ""))
-            weapon_embed.set_footer(text="📄 For the latest updates, visit the War Brokers Wiki.")
+            weapon_embed = WEAPON_EMBEDS.get(weapon) or build_weapon_embed(weapon)
 
             # Link to the weapon's wiki page
             wiki_link = WEAPON_WIKI_LINKS.get(weapon, "")
@@ -1268,26 +1293,12 @@ class WeaponInfoView(discord.ui.View):
 
 # Helper function to show weapon categories
 async def show_weapon_categories(interaction: discord.Interaction):
-    embed = discord.Embed(
-        title="🔫 Weapon Categories", 
-        description="Select a category below to view the available weapons.",
-        color=discord.Color.blue()
-    )
-
-    # Loop through categories and add fields to the embed
-    for category, weapons in WEAPON_CATEGORIES.items():
-        emoji = CATEGORY_EMOJIS.get(category, "")
-        embed.add_field(name=f"{emoji} {category}", value=f"View {category} weapons", inline=False)
-
-    embed.set_footer(text="📄 For the latest updates, visit the War Brokers Wiki.")
-    embed.set_thumbnail(url="https://i.imgur.com/Rt6nDrT.png")
-
     # Create buttons for each weapon category
     view = discord.ui.View(timeout=None)
     for category in WEAPON_CATEGORIES.keys():
         view.add_item(discord.ui.Button(label=f"{category} Weapons", style=discord.ButtonStyle.primary, custom_id=f"category_{category}"))
 
-    await interaction.response.send_message(embed=embed, view=view)
+    await interaction.response.send_message(embed=WEAPON_CATEGORIES_EMBED, view=view)
 
 
 # Command to display weapon categories and weapons
@@ -1317,35 +1328,20 @@ class RanksView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
 
-@bot.tree.command(name="ranks", description="Show player ranks based on ELO")
-async def ranks(interaction: discord.Interaction):
-    
-    
-    ranks = [
-        ("Bronze", 1500, "<:bronze:1297740711617237064>"),
-        ("Iron", 1600, "<:iron:1297740730101534730>"),
-        ("Silver", 1700, "<:silver:1297740740314529812>"),
-        ("Gold", 1800, "<:gold:1297740724347080785>"),
-        ("Platinum", 1900, "<:platinum:1297740737307344916>"),
-        ("Diamond", 2000, "<:diamond:1297740714821550121>"),
-        ("Elite", 2100, "<:elite:1297740717803962400>"),
-        ("Immortal", 2200, "<:immortal:1297740727433822342>"),
-        ("Mythic", 2300, "<:mythic:1297740733968810064>"),
-        ("Eternal", 2400, "<:eternal:1297740721226252338>")
-    ]
-
+def build_ranks_embed():
     embed = discord.Embed(title="Player Ranks", color=discord.Color.blue())
-
-    # Loop through ranks to find the player's current rank
-    for rank, elo, emoji in ranks:
-        
-            embed.add_field(name=f"{emoji} {rank}", value=f"{elo}+ ELO", inline=False)
-         
+    for rank, elo, emoji in RANKS:
+        embed.add_field(name=f"{emoji} {rank}", value=f"{elo}+ ELO", inline=False)
 
     # Add footer to the embed
     embed.set_footer(text="These ranks are only intended for this bot.")
+    return embed
+
+RANKS_EMBED = build_ranks_embed()
 
-    await interaction.response.send_message(embed=embed, view=RanksView())
+@bot.tree.command(name="ranks", description="Show player ranks based on ELO")
+async def ranks(interaction: discord.Interaction):
+    await interaction.response.send_message(embed=RANKS_EMBED, view=RanksView())
 
 
 VEHICLE_CATEGORIES = {
@@ -1484,6 +1480,46 @@ VEHICLE_INFO = {
 }
 
 
+def build_vehicle_embed(vehicle, position, count):
+    info = VEHICLE_INFO[vehicle]
+
+    embed = discord.Embed(title=f"{vehicle} Information", color=discord.Color.green())
+
+    # Add vehicle image
+    embed.set_thumbnail(url=VEHICLE_IMAGES.get(vehicle, ""))
+
+    # Add damage information
+    damage_info = "\n".join([f"{target}: {amount}" for target, amount in info['damage'].items()])
+    embed.add_field(name="Damage Values", value=damage_info, inline=False)
+
+    # Add maps information
+    maps_info = ", ".join(info['maps'])
+    embed.add_field(name="Available Maps", value=maps_info, inline=False)
+
+    embed.set_footer(text=f"Vehicle {position + 1} of {count}")
+    return embed
+
+def build_vehicle_categories_embed():
+    embed = discord.Embed(
+        title="🚗 Vehicle Categories",
+        description="Select a category to view available vehicles",
+        color=discord.Color.blue()
+    )
+
+    # Add fields for each category
+    for category, vehicles in VEHICLE_CATEGORIES.items():
+        vehicle_list = "\n".join(vehicles)
+        embed.add_field(name=category, value=vehicle_list, inline=False)
+    return embed
+
+VEHICLE_CATEGORIES_EMBED = build_vehicle_categories_embed()
+# Keyed by vehicle; each footer counts the vehicle's place within its category
+VEHICLE_EMBEDS = {
+    vehicle: build_vehicle_embed(vehicle, position, len(vehicles))
+    for vehicles in VEHICLE_CATEGORIES.values()
+    for position, vehicle in enumerate(vehicles)
+}
+
 # Create a vehicle information view
 class VehicleInfoView(discord.ui.View):
     def __init__(self, vehicles: List[str], category: str):
@@ -1495,24 +1531,7 @@ class VehicleInfoView(discord.ui.View):
         self.update_buttons()
 
     def create_embed(self):
-        vehicle = self.vehicles[self.current_page]
-        info = VEHICLE_INFO[vehicle]
-
-        embed = discord.Embed(title=f"{vehicle} Information", color=discord.Color.green())
-
-        # Add vehicle image
-        embed.set_thumbnail(url=VEHICLE_IMAGES.get(vehicle, ""))
-
-        # Add damage information
-        damage_info = "\n".join([f"{target}: {amount}" for target, amount in info['damage'].items()])
-        embed.add_field(name="Damage Values", value=damage_info, inline=False)
-
-        # Add maps information
-        maps_info = ", ".join(info['maps'])
-        embed.add_field(name="Available Maps", value=maps_info, inline=False)
-
-        embed.set_footer(text=f"Vehicle {self.current_page + 1} of {len(self.vehicles)}")
-        return embed
+        return VEHICLE_EMBEDS[self.vehicles[self.current_page]]
 
     def update_buttons(self):
         self.clear_items()
@@ -1553,17 +1572,6 @@ class VehicleInfoView(discord.ui.View):
         return True
 
 async def show_vehicle_categories(interaction: discord.Interaction):
-    embed = discord.Embed(
-        title="🚗 Vehicle Categories",
-        description="Select a category to view available vehicles",
-        color=discord.Color.blue()
-    )
-
-    # Add fields for each category
-    for category, vehicles in VEHICLE_CATEGORIES.items():
-        vehicle_list = "\n".join(vehicles)
-        embed.add_field(name=category, value=vehicle_list, inline=False)
-
     # Create view with category buttons
     view = discord.ui.View(timeout=None)
     for category in VEHICLE_CATEGORIES.keys():
@@ -1573,7 +1581,7 @@ async def show_vehicle_categories(interaction: discord.Interaction):
             custom_id=f"category_{category}"
         ))
 
-    await interaction.response.send_message(embed=embed, view=view)
+    await interaction.response.send_message(embed=VEHICLE_CATEGORIES_EMBED, view=view)
 
 @bot.tree.command(name="vehicle", description="Display vehicle information")
 async def vehicle(interaction: discord.Interaction):
@@ -0,0 +1,334 @@
+import os
+from bs4 import BeautifulSoup, SoupStrainer
+from snapshots import PlayerSnapshot, Ribbon, SquadSnapshot
+
+try:
+    # selectolax 1.0 removed the older Modest backend (selectolax.parser)
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# Pure functions turning upstream responses into snapshots. Nothing in here
+# touches the network or Discord, so results can be cached and re-rendered.
+
+# Only these profile divs, and everything inside them, are built when parsing with BeautifulSoup
+PROFILE_CLASSES = {
+    'player-details-number-box-header', 'player-details-number-box-value', 'page-header', 'ribbon-wrapper'
+}
+DAILIES_ID = 'player-details-dailies-content'
+
+
+def _is_profile_node(name, attrs):
+    if name != 'div':
+        return False
+    classes = attrs.get('class') or ''
+    if isinstance(classes, str):
+        classes = classes.split()
+    return attrs.get('id') == DAILIES_ID or not PROFILE_CLASSES.isdisjoint(classes)
+
+
+PROFILE_STRAINER = SoupStrainer(_is_profile_node)
+SPAN_STRAINER = SoupStrainer('span')
+DIV_STRAINER = SoupStrainer('div')
+
+_backend = None
+
+
+def get_backend():
+    """Return the HTML backend in use: 'selectolax', 'lxml' or 'html.parser'.
+
+    PARSER_BACKEND picks one explicitly, otherwise the fastest installed one is used.
+    """
+    global _backend
+    if _backend is None:
+        available = ['html.parser']
+        if HAS_LXML:
+            available.insert(0, 'lxml')
+        if HTMLParser is not None:
+            available.insert(0, 'selectolax')
+        wanted = os.getenv('PARSER_BACKEND')
+        if wanted and wanted not in available:
+            print(f"Parser backend {wanted} is not installed, using {available[0]}")
+        _backend = wanted if wanted in available else available[0]
+    return _backend
+
+
+def set_backend(name):
+    """Force a backend, or pass None to pick again on next use."""
+    global _backend
+    _backend = name
+
+
+class Document:
+    """A parsed page that answers CSS selector queries with node texts.
+
+    With BeautifulSoup only the nodes matched by `strainer` are built;
+    selectolax parses the whole page in C, which is cheaper than either.
+    """
+
+    def __init__(self, html, strainer=None, backend=None):
+        self.backend = backend or get_backend()
+        if self.backend == 'selectolax':
+            self._tree = HTMLParser(html)
+        else:
+            self._tree = BeautifulSoup(html, self.backend, parse_only=strainer)
+
+    def texts(self, selector, strip_parts=False):
+        """Texts of every node matching selector, in document order.
+
+        strip_parts strips each text piece before joining, like get_text(strip=True).
+        """
+        if self.backend == 'selectolax':
+            return [node.text(strip=strip_parts).strip() for node in self._tree.css(selector)]
+        if strip_parts:
+            return [node.get_text(strip=True) for node in self._tree.select(selector)]
+        return [node.text.strip() for node in self._tree.select(selector)]
+
+    def first_text(self, selector, strip_parts=False):
+        texts = self.texts(selector, strip_parts)
+        return texts[0] if texts else None
+
+    def label_value_pairs(self, tag):
+        """(label, value) for every text-only `tag` directly followed by a text-only sibling `tag`.
+
+        Walks the page once, checking each element's next sibling of the same tag.
+        """
+        pairs = []
+        if self.backend == 'selectolax':
+            for node in self._tree.css(tag):
+                if next(node.iter(include_text=False), None) is not None:
+                    continue
+                sibling = node.next
+                while sibling is not None and sibling.tag != tag:
+                    sibling = sibling.next
+                if sibling is None or next(sibling.iter(include_text=False), None) is not None:
+                    continue
+                label, value = node.text(strip=True), sibling.text(strip=True)
+                if label and value:
+                    pairs.append((label, value))
+            return pairs
+
+        for node in self._tree.find_all(tag):
+            if node.string is None:
+                continue
+            sibling = node.find_next_sibling(tag)
+            if sibling is None or sibling.string is None:
+                continue
+            label, value = node.string.strip(), sibling.string.strip()
+            if label and value:
+                pairs.append((label, value))
+        return pairs
+
+    def nodes(self, selector, child=None):
+        """(attributes, child attributes) for every node matching selector.
+
+        The second item lists the attributes of the node's descendants
+        matching `child`, or is empty when no child selector is given.
+        """
+        if self.backend == 'selectolax':
+            return [
+                (dict(node.attributes), [dict(sub.attributes) for sub in node.css(child)] if child else [])
+                for node in self._tree.css(selector)
+            ]
+        return [
+            (dict(node.attrs), [dict(sub.attrs) for sub in node.select(child)] if child else [])
+            for node in self._tree.select(selector)
+        ]
+
+
+MEDAL_TIERS = ('Gold', 'Silver', 'Bronze', 'Ribbon', 'Unearned')
+STAR_TIERS = {4: 'Gold', 3: 'Silver', 2: 'Bronze', 1: 'Ribbon', 0: 'Unearned'}
+
+# Start of the tooltip header inside a ribbon's tooltip HTML
+RIBBON_HEADER = 'style="background:#454658;">'
+
+# Modes listed on a squad page, in display order
+SQUAD_MODES = (
+    "Death Match", "Battle Royale", "Missile Launch", "Vehicle Escort",
+    "Capture Point", "Package Drop", "Zombie BR"
+)
+
+
+def parse_int(text, default=None):
+    """Parse a number like '12,345' into an int."""
+    try:
+        return int(str(text).replace(',', '').strip())
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_float(text, default=None):
+    try:
+        return float(str(text).replace(',', '').strip())
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_number_boxes(doc):
+    """Map each player-details number box header to its value text."""
+    headers = doc.texts("div.player-details-number-box-header")
+    values = doc.texts("div.player-details-number-box-value")
+    return dict(zip(headers, values))
+
+
+def parse_name_and_level(doc):
+    player_name_parts = doc.first_text("div.page-header", strip_parts=True).split('Lvl')
+    return player_name_parts[0].strip(), int(player_name_parts[1].strip())
+
+
+def ribbon_tier(stars):
+    """Medal tier for a ribbon with this many stars."""
+    return STAR_TIERS.get(stars, 'Gold' if stars > 4 else 'Unearned')
+
+
+def parse_ribbons(doc):
+    """Read every ribbon on a profile page in a single walk over the ribbon wrappers.
+
+    Each wrapper carries its tooltip as escaped HTML in an attribute: the
+    ribbon name follows the tooltip header and every earned star is a
+    &#10031; entity. Each copy of the ribbon list ends with the Purple Heart,
+    which is not a medal. When the page renders the list twice the second
+    copy is read, as the original scraper did.
+    """
+    copies = [[]]
+    for attrs, images in doc.nodes("div.ribbon-wrapper", "img"):
+        sources = " ".join(image.get('src', '') for image in images)
+        tooltip = next((value for value in attrs.values() if isinstance(value, str) and RIBBON_HEADER in value), None)
+        if 'purpleHeart' in sources or (tooltip and 'purpleHeart' in tooltip):
+            copies.append([])
+        elif tooltip is not None:
+            copies[-1].append(tooltip)
+
+    ribbons = []
+    for tooltip in copies[1] if len(copies) > 2 else copies[0]:
+        name = tooltip.split(RIBBON_HEADER, 1)[1].split('<', 1)[0].split('&', 1)[0].strip()
+        stars = tooltip.count('&#10031;') + tooltip.count('\u272f')
+        ribbons.append(Ribbon(name, ribbon_tier(stars), stars))
+    return ribbons
+
+
+def parse_dailies(doc):
+    """Read today's daily rankings as (placement, title) pairs."""
+    container = f"div#{DAILIES_ID} div.player-details-daily-circle-container"
+    placements = doc.texts(f"{container} div.player-details-daily-circle")
+    titles = doc.texts(f"{container} div.tooltip-header")
+    return list(zip(placements, titles))
+
+
+def parse_player_api(data):
+    """Read every player field wbapi getPlayer provides, skipping any it lacks.
+
+    Returns a dict keyed by PlayerSnapshot field names.
+    """
+    if not isinstance(data, dict):
+        return {}
+
+    fields = {
+        "name": data.get("nick"),
+        "level": parse_int(data.get("level")),
+        "xp": parse_int(data.get("xp")),
+        "kills_elo": parse_float(data.get("killsELO")),
+        "games_elo": parse_float(data.get("gamesELO")),
+        "last_seen": parse_int(data.get("time"))
+    }
+    # Totals only, the API may also report kills and deaths broken down per weapon
+    for field in ("kills", "deaths"):
+        if isinstance(data.get(field), int):
+            fields[field] = data[field]
+    losses = data.get("losses")
+    if isinstance(losses, dict):
+        fields["m00_losses"] = parse_int(losses.get("m00"), 0)
+    else:
+        # The API answered, so a player without a losses record has none
+        fields["m00_losses"] = 0
+    return {field: value for field, value in fields.items() if value is not None}
+
+
+def parse_elo_page(html):
+    """Read XP, Kills Elo and Games Elo from a stats.wbpjs.com player page."""
+    # Each label span is directly followed by the span holding its value
+    spans = Document(html, SPAN_STRAINER).texts("span")
+    values = {}
+    for label, value in zip(spans, spans[1:]):
+        if label in ('XP', 'Kills Elo', 'Games Elo') and label not in values:
+            values[label] = value
+    fields = {
+        "xp": parse_int(values.get('XP')),
+        "kills_elo": parse_float(values.get('Kills Elo')),
+        "games_elo": parse_float(values.get('Games Elo'))
+    }
+    return {field: value for field, value in fields.items() if value is not None}
+
+
+def parse_player(uid, profile_html, known=None):
+    """Build a PlayerSnapshot from the profile page plus fields already known from other sources.
+
+    Values in `known` win over the profile page; the page fills in the rest.
+    """
+    doc = Document(profile_html, PROFILE_STRAINER)
+    numbers = parse_number_boxes(doc)
+    name, level = parse_name_and_level(doc)
+
+    fields = {
+        "uid": uid,
+        "name": name,
+        "level": level,
+        "xp": None,
+        "kills_elo": None,
+        "games_elo": None,
+        "kills": parse_int(numbers.get("Kills"), 0),
+        "deaths": parse_int(numbers.get("Deaths"), 0),
+        "kd": parse_float(numbers.get("Kills / Death")),
+        "classic_wins": parse_int(numbers.get("Classic Mode Wins")),
+        "br_wins": parse_int(numbers.get("Battle Royale Wins")),
+        "zombie_br_wins": parse_int(numbers.get("Zombie BR Wins")),
+        "ribbons": parse_ribbons(doc),
+        "dailies": parse_dailies(doc)
+    }
+    fields.update(known or {})
+    return PlayerSnapshot(**fields)
+
+
+def parse_kills_deaths(profile_html):
+    """Read just kills and deaths from a profile page."""
+    numbers = parse_number_boxes(Document(profile_html, PROFILE_STRAINER))
+    return parse_int(numbers.get("Kills"), 0), parse_int(numbers.get("Deaths"), 0)
+
+
+def parse_squad_wins(html):
+    """Read the wins per game mode from a squad page in one pass.
+
+    Known modes come back in SQUAD_MODES order; a mode missing from the
+    page is simply absent, and any other "... Wins" label is kept as a new mode.
+    """
+    found = {}
+    extra = {}
+    for label, value in Document(html, DIV_STRAINER).label_value_pairs("div"):
+        mode = next((mode for mode in SQUAD_MODES if mode in label), None)
+        if mode is not None:
+            found.setdefault(mode, value)
+        elif label.endswith(" Wins"):
+            extra.setdefault(label[:-len(" Wins")], value)
+    wins = {mode: found[mode] for mode in SQUAD_MODES if mode in found}
+    wins.update(extra)
+    return wins
+
+
+def build_squad(tag, members, game_wins=None):
+    """Sum the ELO and levels of the wbapi squad members into a SquadSnapshot.
+
+    Kills and deaths come from each member's profile and are added with
+    SquadSnapshot.add_member_stats as those pages are read.
+    """
+    squad = SquadSnapshot(tag, count=len(members), game_wins=game_wins)
+    for member in members:
+        squad.kills_elo_total += member.get("killsELO", 0)
+        squad.games_elo_total += member.get("gamesELO", 0)
+        squad.level += member.get("level", 0)
+    return squad
@@ -0,0 +1,202 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitTimeout(asyncio.TimeoutError):
+    """Raised instead of waiting longer than a bucket's max_wait for a token."""
+
+    def __init__(self, max_wait):
+        super().__init__(f"No request slot within {max_wait:g}s")
+        self.max_wait = max_wait
+
+
+class AdaptiveTokenBucket:
+    """Token bucket for one upstream host whose rate follows the host's answers.
+
+    Each request takes a token; tokens refill at `rate` per second up to
+    `burst`. Every successful answer raises the rate by `increase` per
+    second, while a 429, a 5xx or a failed connection multiplies it by
+    `decrease`, always within [min_rate, max_rate]. The rate therefore settles
+    just under what the host tolerates. A Retry-After header also pauses the
+    bucket until that time has passed, for at most `max_pause` seconds.
+
+    No caller waits more than `max_wait` seconds for its token: when the
+    pause or the queue ahead would take longer, acquire raises
+    RateLimitTimeout right away so the caller can fall back instead of hanging.
+    """
+
+    def __init__(self, rate, burst, min_rate, max_rate, increase=0.05, decrease=0.5, max_pause=60.0, max_wait=10.0):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_pause = max_pause
+        self.max_wait = max_wait
+        self.tokens = float(burst)
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()  # waiters are served in arrival order
+        # Counters exposed as metrics
+        self.requests = 0
+        self.throttled = 0
+        self.failures = 0
+        self.waited = 0.0
+        self.timeouts = 0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _timeout(self):
+        self.timeouts += 1
+        return RateLimitTimeout(self.max_wait)
+
+    async def acquire(self):
+        """Wait until a request may be sent and take its token, or raise RateLimitTimeout."""
+        deadline = time.monotonic() + self.max_wait
+        if self.paused_until > deadline:
+            raise self._timeout()
+        try:
+            await asyncio.wait_for(self._lock.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            raise self._timeout() from None
+        try:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        self.requests += 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                if now + wait > deadline:
+                    raise self._timeout()
+                self.waited += wait
+                await asyncio.sleep(wait)
+        finally:
+            self._lock.release()
+
+    def _slow_down(self):
+        self.rate = max(self.rate * self.decrease, self.min_rate)
+        # Drop any saved up burst so the lower rate applies right away
+        self.tokens = min(self.tokens, 0.0)
+
+    def record(self, status, retry_after=None):
+        """Adjust the rate to a response's status and Retry-After header."""
+        pause = parse_retry_after(retry_after)
+        if pause:
+            pause = min(pause, self.max_pause)
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+        if status == 429 or status >= 500:
+            self.throttled += 1
+            self._slow_down()
+        else:
+            self.rate = min(self.rate + self.increase, self.max_rate)
+
+    def record_failure(self):
+        """A request that got no answer at all, such as a timeout or refused connection."""
+        self.failures += 1
+        self._slow_down()
+
+    def metrics(self):
+        now = time.monotonic()
+        return {
+            "rate": round(self.rate, 3),
+            "tokens": round(min(self.burst, self.tokens + (now - self._updated) * self.rate), 3),
+            "paused_for": round(max(self.paused_until - now, 0.0), 3),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "waited": round(self.waited, 3),
+            "timeouts": self.timeouts
+        }
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+    def __init__(self, host):
+        super().__init__(f"{host} is unavailable")
+        self.host = host
+
+
+class CircuitBreaker:
+    """Stops requests to a host that keeps failing, then probes it to see if it is back.
+
+    Closed: requests flow and consecutive failures are counted. After
+    `failure_threshold` of them the circuit opens and requests fail at once
+    for `reset_timeout` seconds. It then goes half-open and lets a single
+    trial request through: success closes it, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, host, failure_threshold=5, reset_timeout=30.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self.rejected = 0
+
+    @property
+    def available(self):
+        """False while requests to the host would be refused."""
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        return self.state == self.CLOSED or not self._trial_running
+
+    def before_request(self):
+        """Let a request through or raise CircuitOpenError; returns True for the half-open trial."""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._trial_running):
+            self.rejected += 1
+            raise CircuitOpenError(self.host)
+        if self.state == self.HALF_OPEN:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def end_trial(self):
+        """Count a trial request that finished without recording anything (say it was cancelled) as failed."""
+        if self._trial_running:
+            self.record_failure()
+
+    def metrics(self):
+        return {"state": self.state, "failures": self.failures, "rejected": self.rejected}
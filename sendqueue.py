@@ -0,0 +1,104 @@
+import asyncio
+import random
+from collections import deque
+import discord
+
+# Outbound Discord messages. A rate limited followup or edit is retried on
+# its own, so the work that produced it is never repeated.
+
+
+def interaction_route(interaction):
+    """Route key for an interaction's followups and their edits, which share one webhook bucket."""
+    return f"webhook:{interaction.application_id}:{interaction.token}"
+
+
+def _retrieve(future):
+    # Failures are already printed; this keeps asyncio from warning about fire-and-forget sends
+    if not future.cancelled():
+        future.exception()
+
+
+class _Job:
+    __slots__ = ('send', 'key', 'future')
+
+    def __init__(self, send, key, future):
+        self.send = send
+        self.key = key
+        self.future = future
+
+
+class SendQueue:
+    """Sends followups and edits one at a time per Discord route.
+
+    `send` is a zero-argument callable returning the coroutine to run. A send
+    answered with 429 or a 5xx is retried up to `retries` times, waiting the
+    Retry-After Discord gave plus a random jitter, or a jittered exponential
+    backoff when it gave none. A queued send with the same `key` as a newer
+    one (like two edits of one message) is replaced, so only the newest runs.
+    """
+
+    def __init__(self, retries=4, base_delay=1.0, max_delay=30.0):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._routes = {}  # route -> deque of jobs waiting to be sent
+        self._workers = {}  # route -> task draining that deque
+
+    def submit(self, route, send, key=None):
+        """Queue a send and return a future for its result."""
+        jobs = self._routes.setdefault(route, deque())
+        if key is not None:
+            for job in jobs:
+                if job.key == key:
+                    job.send = send
+                    return job.future
+
+        job = _Job(send, key, asyncio.get_running_loop().create_future())
+        job.future.add_done_callback(_retrieve)
+        jobs.append(job)
+        if route not in self._workers:
+            self._workers[route] = asyncio.create_task(self._drain(route))
+        return job.future
+
+    async def send(self, route, send, key=None):
+        """Queue a send and wait for its result."""
+        return await self.submit(route, send, key)
+
+    def _delay(self, error, attempt):
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is None and error.response is not None:
+            try:
+                retry_after = float(error.response.headers.get('Retry-After', ''))
+            except ValueError:
+                retry_after = None
+        if retry_after is None:
+            return backoff
+        return retry_after + random.uniform(0, self.base_delay)
+
+    async def _attempt(self, job):
+        for attempt in range(self.retries + 1):
+            try:
+                return await job.send()
+            except discord.HTTPException as e:
+                if attempt == self.retries or not (e.status == 429 or e.status >= 500):
+                    raise
+                await asyncio.sleep(self._delay(e, attempt))
+
+    async def _drain(self, route):
+        jobs = self._routes[route]
+        try:
+            while jobs:
+                job = jobs.popleft()
+                try:
+                    result = await self._attempt(job)
+                except Exception as e:
+                    print(f"Error sending Discord message: {e!r}")
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+        finally:
+            del self._routes[route]
+            del self._workers[route]
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+import http_client
+
+SERVER_LIST_URL = "https://store2.warbrokers.io/293//server_list.php?location={region}"
+
+
+class ServerList:
+    """One region's server_list.php response, decoded once into parallel array columns.
+
+    Row i is the server with mode id modes[i], map id maps[i] and players[i]
+    players. Filtering runs over the columns without building per-server objects.
+    """
+
+    __slots__ = ('region', 'modes', 'maps', 'players')
+
+    def __init__(self, region, modes=None, maps=None, players=None):
+        self.region = region
+        self.modes = modes if modes is not None else array('H')
+        self.maps = maps if maps is not None else array('H')
+        self.players = players if players is not None else array('H')
+
+    @classmethod
+    def parse(cls, region, text):
+        """Decode a response where every server starts with ",{region}," followed by mode, players and map."""
+        servers = cls(region)
+        for record in text.split(f",{region},")[1:]:
+            fields = record.split(",", 4)
+            servers.modes.append(int(fields[1]))
+            servers.players.append(int(fields[2]))
+            servers.maps.append(int(fields[3]))
+        return servers
+
+    def __len__(self):
+        return len(self.players)
+
+    def select(self, modes=None, maps=None, min_players=None, max_players=None):
+        """Row numbers of the non-empty servers passing every filter."""
+        low = max(min_players or 1, 1)
+        high = max_players if max_players is not None else 0xFFFF
+        return [
+            row for row, (mode, map_id, players) in enumerate(zip(self.modes, self.maps, self.players))
+            if low <= players <= high
+            and (modes is None or mode in modes)
+            and (maps is None or map_id in maps)
+        ]
+
+    def sorted_active(self):
+        """A copy without empty servers, ordered by mode, map and players."""
+        rows = sorted(self.select(), key=lambda row: (self.modes[row], self.maps[row], self.players[row]))
+        return ServerList(
+            self.region,
+            array('H', (self.modes[row] for row in rows)),
+            array('H', (self.maps[row] for row in rows)),
+            array('H', (self.players[row] for row in rows))
+        )
+
+
+async def fetch_region(region):
+    """ServerList for every server in a region, or None when the region answered with an error."""
+    status, text = await http_client.fetch_text(SERVER_LIST_URL.format(region=region))
+    if status != 200:
+        # An error body would parse as an empty list and hide the region's servers
+        print(f"Server list for {region} answered {status}")
+        return None
+    return ServerList.parse(region, text)
+
+
+class ServerIndex:
+    """Active servers indexed by region, mode id and map id.
+
+    Each region's servers are kept as one ServerList sorted by mode, map and
+    players, with the row range of every (mode, map) pair recorded. A player
+    range is then two bisects over the players column. Empty servers are left out.
+    """
+
+    def __init__(self, region_servers):
+        self._lists = {}
+        # region -> mode id -> map id -> (first row, end row)
+        self._ranges = {}
+        self.size = 0
+        for region, servers in region_servers.items():
+            servers = servers.sorted_active()
+            self._lists[region] = servers
+            self.size += len(servers)
+            ranges = self._ranges.setdefault(region, {})
+            start = 0
+            for row in range(1, len(servers) + 1):
+                if row == len(servers) or (servers.modes[row], servers.maps[row]) != (servers.modes[start], servers.maps[start]):
+                    ranges.setdefault(servers.modes[start], {})[servers.maps[start]] = (start, row)
+                    start = row
+
+    def query(self, regions, modes=None, maps=None, min_players=None, max_players=None):
+        """(region, mode id, map id, players) for every matching server, in the given region order.
+
+        modes and maps are collections of ids, or None for any.
+        """
+        results = []
+        for region in regions:
+            servers = self._lists.get(region)
+            if servers is None:
+                continue
+            players = servers.players
+            region_modes = self._ranges[region]
+            for mode in (modes if modes is not None else region_modes):
+                mode_maps = region_modes.get(mode, {})
+                for map_id in (maps if maps is not None else mode_maps):
+                    if map_id not in mode_maps:
+                        continue
+                    start, end = mode_maps[map_id]
+                    lo = bisect_left(players, min_players, start, end) if min_players is not None else start
+                    hi = bisect_right(players, max_players, start, end) if max_players is not None else end
+                    results.extend((region, mode, map_id, players[row]) for row in range(lo, hi))
+        return results
+
+
+class ServerPoller:
+    """Polls every region's server list on a fixed interval and keeps a ServerIndex of the result.
+
+    One poll per interval serves every /findmatch in between. A region that
+    fails to answer keeps the servers from its last successful poll.
+    """
+
+    def __init__(self, regions, interval, timeout):
+        self.regions = list(regions)
+        self.interval = interval
+        self.timeout = timeout
+        self.index = ServerIndex({})
+        self.updated_at = None
+        self._region_servers = {}
+        self._task = None
+        self._refreshing = None
+
+    @property
+    def ready(self):
+        return self.updated_at is not None
+
+    async def _fetch(self, region):
+        try:
+            return await asyncio.wait_for(fetch_region(region), timeout=self.timeout)
+        except Exception as e:
+            print(f"Error fetching servers for {region}: {e!r}")
+            return None
+
+    async def _poll(self):
+        results = await asyncio.gather(*(self._fetch(region) for region in self.regions))
+        for region, servers in zip(self.regions, results):
+            if servers is not None:
+                self._region_servers[region] = servers
+        self.index = ServerIndex(self._region_servers)
+        self.updated_at = time.time()
+
+    async def refresh(self):
+        """Poll now, or wait for the poll already running."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._poll())
+        await asyncio.shield(self._refreshing)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Error polling server lists: {e!r}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,199 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class Ribbon:
+    """One ribbon from a player's profile and how many stars it has earned."""
+
+    __slots__ = ('name', 'tier', 'stars')
+
+    def __init__(self, name: str, tier: str, stars: int):
+        self.name = name
+        self.tier = tier
+        self.stars = stars
+
+    def to_dict(self):
+        return {'name': self.name, 'tier': self.tier, 'stars': self.stars}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['tier'], data['stars'])
+
+    def __eq__(self, other):
+        if not isinstance(other, Ribbon):
+            return NotImplemented
+        return (self.name, self.tier, self.stars) == (other.name, other.tier, other.stars)
+
+    def __repr__(self):
+        return f"Ribbon(name={self.name!r}, tier={self.tier!r}, stars={self.stars})"
+
+
+class PlayerSnapshot:
+    """Parsed numbers for one player, independent of how they are rendered."""
+
+    __slots__ = (
+        'uid', 'name', 'level', 'xp', 'kills_elo', 'games_elo',
+        'kills', 'deaths', 'kd', 'classic_wins', 'br_wins', 'zombie_br_wins',
+        'last_seen', 'm00_losses', 'ribbons', 'dailies', 'unavailable', 'fetched_at'
+    )
+
+    def __init__(
+        self,
+        uid: str,
+        name: str,
+        level: int,
+        xp: int,
+        kills_elo: float,
+        games_elo: float,
+        kills: Optional[int],
+        deaths: Optional[int],
+        kd: Optional[float] = None,
+        classic_wins: Optional[int] = None,
+        br_wins: Optional[int] = None,
+        zombie_br_wins: Optional[int] = None,
+        last_seen: Optional[int] = None,
+        m00_losses: Optional[int] = None,
+        ribbons: Optional[List[Ribbon]] = None,
+        dailies: Optional[List[Tuple[str, str]]] = None,
+        unavailable: Optional[List[str]] = None,
+        fetched_at: Optional[float] = None
+    ):
+        self.uid = uid
+        self.name = name
+        self.level = level
+        self.xp = xp
+        self.kills_elo = kills_elo
+        self.games_elo = games_elo
+        self.kills = kills
+        self.deaths = deaths
+        self.kd = kd
+        self.classic_wins = classic_wins
+        self.br_wins = br_wins
+        self.zombie_br_wins = zombie_br_wins
+        # Unix time the player was last online, None when the API did not say
+        self.last_seen = last_seen
+        # Classic losses from the API, None when the API could not be reached
+        self.m00_losses = m00_losses
+        self.ribbons = ribbons if ribbons is not None else []
+        # Today's daily rankings as (placement, title) pairs
+        self.dailies = [tuple(daily) for daily in dailies] if dailies is not None else []
+        # Hosts that were down when this snapshot was built, so some numbers may be missing
+        self.unavailable = list(unavailable) if unavailable is not None else []
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    def medal_counts(self, tiers):
+        """Number of ribbons in each of the given tiers, in that order."""
+        counts = {tier: 0 for tier in tiers}
+        for ribbon in self.ribbons:
+            if ribbon.tier in counts:
+                counts[ribbon.tier] += 1
+        return counts
+
+    def fill_missing(self, older):
+        """Take every number and the ribbons this snapshot lacks from an older snapshot of the same player.
+
+        Used when a source was down, so a partial snapshot does not hide good
+        numbers that were already known. Dailies are not copied, they expire each day.
+        """
+        for name in self.__slots__:
+            if name in ('uid', 'ribbons', 'dailies', 'unavailable', 'fetched_at'):
+                continue
+            if getattr(self, name) is None:
+                setattr(self, name, getattr(older, name))
+        if not self.ribbons:
+            self.ribbons = list(older.ribbons)
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['ribbons'] = [ribbon.to_dict() for ribbon in self.ribbons]
+        data['dailies'] = [list(daily) for daily in self.dailies]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        values = {name: data[name] for name in cls.__slots__ if name in data}
+        values['ribbons'] = [Ribbon.from_dict(ribbon) for ribbon in data.get('ribbons', [])]
+        return cls(**values)
+
+    def same_stats(self, other):
+        """True when both snapshots hold the same numbers, ignoring when they were fetched."""
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__ if name != 'fetched_at')
+
+    def __eq__(self, other):
+        if not isinstance(other, PlayerSnapshot):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"PlayerSnapshot(uid={self.uid!r}, name={self.name!r}, level={self.level})"
+
+
+class SquadSnapshot:
+    """Summed numbers for every member of a squad plus its game mode wins."""
+
+    __slots__ = (
+        'tag', 'count', 'scanned', 'level', 'kills', 'deaths',
+        'kills_elo_total', 'games_elo_total', 'game_wins', 'fetched_at'
+    )
+
+    def __init__(
+        self,
+        tag: str,
+        count: int = 0,
+        scanned: int = 0,
+        level: int = 0,
+        kills: int = 0,
+        deaths: int = 0,
+        kills_elo_total: float = 0,
+        games_elo_total: float = 0,
+        game_wins: Optional[Dict[str, str]] = None,
+        fetched_at: Optional[float] = None
+    ):
+        self.tag = tag
+        self.count = count
+        # Members whose kills and deaths have been added so far
+        self.scanned = scanned
+        self.level = level
+        self.kills = kills
+        self.deaths = deaths
+        self.kills_elo_total = kills_elo_total
+        self.games_elo_total = games_elo_total
+        # None when the squad page could not be read
+        self.game_wins = game_wins
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    @property
+    def complete(self):
+        return self.scanned >= self.count
+
+    def add_member_stats(self, kills, deaths):
+        self.kills += kills
+        self.deaths += deaths
+        self.scanned += 1
+
+    @property
+    def avg_kills_elo(self):
+        return self.kills_elo_total / self.count if self.count else 0
+
+    @property
+    def avg_games_elo(self):
+        return self.games_elo_total / self.count if self.count else 0
+
+    @property
+    def kd(self):
+        return self.kills / self.deaths if self.deaths > 0 else 0
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def __eq__(self, other):
+        if not isinstance(other, SquadSnapshot):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"SquadSnapshot(tag={self.tag!r}, count={self.count})"
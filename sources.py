@@ -0,0 +1,141 @@
+import asyncio
+from urllib.parse import urlsplit
+import aiohttp
+import http_client
+import parsers
+from snapshots import PlayerSnapshot
+
+# Upstream data sources. The wbapi JSON endpoints are tried first because
+# decoding JSON is far cheaper than building a tree from HTML; the HTML
+# pages are only read for fields the API does not provide.
+
+API_URL = "https://wbapi.wbpjs.com"
+PROFILE_URL = "https://stats.warbrokers.io/players/i/{uid}"
+ELO_PAGE_URL = "https://stats.wbpjs.com/players/{uid}"
+SQUAD_PAGE_URL = "https://stats.warbrokers.io/squads/{tag}"
+
+# Fields only the stats.wbpjs.com page has when the API leaves them out
+ELO_PAGE_FIELDS = ('xp', 'kills_elo', 'games_elo')
+
+# What a source that is down raises: an open circuit, a failed connection or a timeout
+# (which includes a RateLimitTimeout from a host's rate limiter)
+UNAVAILABLE_ERRORS = (http_client.CircuitOpenError, aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+def host_of(url):
+    return urlsplit(url).hostname
+
+
+def is_unavailable_status(status):
+    """True for answers that mean the host is down or throttling us rather than that the page is missing."""
+    return status == 429 or status >= 500
+
+
+class SourcesUnavailable(Exception):
+    """Raised when a player cannot be built because the sources it needs are down."""
+
+    def __init__(self, hosts):
+        super().__init__(f"Unavailable: {', '.join(hosts)}")
+        self.hosts = list(hosts)
+
+
+async def _fetch_available(fetch, url, unavailable):
+    """Run fetch(url) for its (status, body), noting the host in `unavailable` and returning None when it is down."""
+    try:
+        response = await fetch(url)
+    except UNAVAILABLE_ERRORS as e:
+        print(f"{host_of(url)} unavailable: {e!r}")
+        unavailable.append(host_of(url))
+        return None
+    if is_unavailable_status(response[0]):
+        unavailable.append(host_of(url))
+        return None
+    return response
+
+
+async def fetch_player_api(uid, unavailable=None):
+    """Player fields from wbapi getPlayer, or None when the API did not answer."""
+    response = await _fetch_available(
+        http_client.fetch_json, f"{API_URL}/players/getPlayer?uid={uid}",
+        unavailable if unavailable is not None else []
+    )
+    if response is None:
+        return None
+    status, data = response
+    if status != 200 or data is None:
+        return None
+    return parsers.parse_player_api(data)
+
+
+async def fetch_player(uid):
+    """A PlayerSnapshot for uid, or None when the player could not be read.
+
+    The profile page is always needed for wins, ribbons and dailies, so it is
+    fetched alongside the API; the ELO page is only fetched if the API lacked
+    one of its fields. Only a 404 from the profile page means the uid is
+    unknown. A source that is down or answers with an error is skipped and
+    named in the snapshot's `unavailable`; if the profile page is down the
+    snapshot is built from the API alone, and SourcesUnavailable is raised
+    when that is not enough either. An ELO page that cannot be read just
+    leaves its fields empty.
+    """
+    unavailable = []
+    api_fields, profile = await asyncio.gather(
+        fetch_player_api(uid, unavailable),
+        _fetch_available(http_client.fetch_text, PROFILE_URL.format(uid=uid), unavailable)
+    )
+    if profile is not None and profile[0] != 200:
+        if profile[0] == 404:
+            return None
+        print(f"{host_of(PROFILE_URL)} answered {profile[0]} for {uid}")
+        unavailable.append(host_of(PROFILE_URL))
+        profile = None
+
+    known = dict(api_fields or {})
+    if any(field not in known for field in ELO_PAGE_FIELDS):
+        elo_page = await _fetch_available(http_client.fetch_text, ELO_PAGE_URL.format(uid=uid), unavailable)
+        if elo_page is not None and elo_page[0] == 200:
+            for field, value in parsers.parse_elo_page(elo_page[1]).items():
+                known.setdefault(field, value)
+
+    if profile is None:
+        if "name" not in known or "level" not in known:
+            raise SourcesUnavailable(unavailable)
+        snapshot = PlayerSnapshot(
+            uid, known.pop("name"), known.pop("level"), known.pop("xp", None),
+            known.pop("kills_elo", None), known.pop("games_elo", None),
+            known.pop("kills", None), known.pop("deaths", None), **known
+        )
+    else:
+        snapshot = parsers.parse_player(uid, profile[1], known)
+    snapshot.unavailable = unavailable
+    return snapshot
+
+
+async def fetch_kills_deaths(uid):
+    """(kills, deaths) from a player's profile page, or None when it could not be read."""
+    response = await _fetch_available(http_client.fetch_text, PROFILE_URL.format(uid=uid), [])
+    if response is None or response[0] != 200:
+        return None
+    return parsers.parse_kills_deaths(response[1])
+
+
+async def fetch_squad_members(tag):
+    """(status, member list) from wbapi getSquadMembers.
+
+    Raises SourcesUnavailable when the API is down or throttling us, so an
+    outage is not mistaken for an unknown tag.
+    """
+    url = f"{API_URL}/squad/getSquadMembers?squadName={tag}"
+    status, members = await http_client.fetch_json(url)
+    if is_unavailable_status(status):
+        raise SourcesUnavailable([host_of(url)])
+    return status, members
+
+
+async def fetch_squad_wins(tag):
+    """Wins per game mode from the squad page, or None when it could not be read."""
+    response = await _fetch_available(http_client.fetch_text, SQUAD_PAGE_URL.format(tag=tag), [])
+    if response is None or response[0] != 200:
+        return None
+    return parsers.parse_squad_wins(response[1])
@@ -0,0 +1,378 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Linked accounts: Discord user id -> (War Brokers uid, profile picture link).
+# Every store is used from the event loop through coroutines; disk work runs
+# on the store's own thread so a slow disk never blocks the bot.
+
+STORAGE_FILE = 'storage.json'
+LINK_DB_FILE = os.getenv('LINK_DB_FILE', 'storage.db')
+# Seconds of changes a JSON file collects before it is written once
+FLUSH_INTERVAL = float(os.getenv('STORAGE_FLUSH_INTERVAL', 5))
+
+
+# Version of the stored link data; bumped together with a migration step below
+SCHEMA_VERSION = 3
+
+UID_PATTERN = re.compile(r"[0-9a-f]{24}")
+# A stats page link pasted in place of the uid
+STATS_URL_PATTERN = re.compile(r"/players/(?:i/)?([0-9a-fA-F]{24})")
+# Old /linkstats input sometimes stored the picture link glued onto the uid
+PFP_MARKER = "pfpimgurlink:"
+
+
+def split_uid(text):
+    """(uid, glued pfp link) from a typed or stored uid; uid is None when it is not a valid uid."""
+    uid, _, pfp = (text or "").partition(PFP_MARKER)
+    uid = uid.strip()
+    match = STATS_URL_PATTERN.search(uid)
+    if match:
+        uid = match.group(1)
+    uid = uid.lower()
+    return (uid if UID_PATTERN.fullmatch(uid) else None), (pfp.strip() or None)
+
+
+def parse_uid(text):
+    """The uid in text, or None when it does not hold one."""
+    return split_uid(text)[0]
+
+
+def clean_links(links):
+    """Split {user_id: link} into normalized links and the rows whose uid cannot be recovered."""
+    clean = {}
+    quarantined = {}
+    for user_id, link in links.items():
+        uid, glued_pfp = split_uid(link.get("uid"))
+        if uid is None:
+            quarantined[user_id] = link
+        else:
+            clean[user_id] = {"uid": uid, "pfp": link.get("pfp") or glued_pfp}
+    return clean, quarantined
+
+
+def read_json(path):
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading storage file: {e}")
+    return None
+
+
+def migrate_json_document(data):
+    """Bring a storage.json document up to SCHEMA_VERSION.
+
+    Returns {"version", "links", "quarantine"}; a document already at the
+    current version comes back untouched.
+    """
+    if data is None:
+        return {"version": SCHEMA_VERSION, "links": {}, "quarantine": {}}
+    if "version" not in data:
+        # Unversioned files are a flat user_id -> link map, where a link may still be a bare uid string
+        data = {
+            "version": 1,
+            "links": {
+                user_id: value if isinstance(value, dict) else {"uid": value, "pfp": None}
+                for user_id, value in data.items()
+            },
+            "quarantine": {}
+        }
+    if data["version"] < 2:
+        links, quarantined = clean_links(data["links"])
+        if quarantined:
+            print(f"Quarantined {len(quarantined)} linked accounts with an invalid uid")
+        data = {"version": 2, "links": links, "quarantine": {**data.get("quarantine", {}), **quarantined}}
+    if data["version"] < 3:
+        # Links may now carry "last_used", the Unix time their user last looked up stats
+        data = {**data, "version": 3}
+    return data
+
+
+def atomic_write(path, text):
+    """Replace path with text so readers only ever see the old or the new file, never half of one."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JsonPersister:
+    """Write-behind persistence of a dict to a JSON file.
+
+    Callers mutate `data` and call mark_dirty(); a background task waits
+    `interval` seconds after the first change and writes everything changed
+    in between with one atomic write on its own thread. close() flushes
+    whatever is still pending.
+    """
+
+    def __init__(self, path, data, interval=FLUSH_INTERVAL, indent=None):
+        self.path = path
+        self.data = data
+        self.interval = interval
+        self.indent = indent
+        self.dirty = False
+        self._wake = None
+        self._task = None
+        self._executor = None
+
+    def mark_dirty(self):
+        self.dirty = True
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        if self._task is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'persist-{self.path}')
+            self._wake = asyncio.Event()
+            if self.dirty:
+                self._wake.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            # Let the rest of a burst of changes land before writing
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        if self._wake is not None:
+            self._wake.clear()
+        text = json.dumps(self.data, indent=self.indent)
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, atomic_write, self.path, text)
+        except OSError as e:
+            print(f"Error saving {self.path}: {e}")
+            self.mark_dirty()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class JsonLinkStore:
+    """Linked accounts kept in memory and written behind to storage.json.
+
+    The file is migrated to SCHEMA_VERSION when loaded, and written back once
+    if that changed anything, so later starts load it as is.
+    """
+
+    def __init__(self, path=STORAGE_FILE, interval=FLUSH_INTERVAL):
+        data = read_json(path)
+        self.document = migrate_json_document(data)
+        self.links = self.document["links"]
+        self.persister = JsonPersister(path, self.document, interval, indent=4)
+        if self.document is not data:
+            self.persister.mark_dirty()
+
+    async def open(self):
+        self.persister.start()
+
+    async def close(self):
+        await self.persister.close()
+
+    async def get(self, user_id):
+        """(uid, pfp link) linked to a Discord user, or (None, None)."""
+        link = self.links.get(str(user_id))
+        return (link.get("uid"), link.get("pfp")) if link else (None, None)
+
+    async def set(self, user_id, uid, pfp=None):
+        self.links[str(user_id)] = {"uid": uid, "pfp": pfp}
+        self.persister.mark_dirty()
+
+    async def delete(self, user_id):
+        if self.links.pop(str(user_id), None) is not None:
+            self.persister.mark_dirty()
+
+    async def users_of(self, uid):
+        """Discord user ids linked to a uid."""
+        return [user_id for user_id, link in self.links.items() if link.get("uid") == uid]
+
+    async def touch(self, user_id, when=None):
+        """Note that a user just used their link."""
+        link = self.links.get(str(user_id))
+        if link is not None:
+            link["last_used"] = when if when is not None else time.time()
+            self.persister.mark_dirty()
+
+    async def recent_uids(self, since):
+        """Linked uids used at or after `since`, most recently used first."""
+        used = {}
+        for link in self.links.values():
+            last_used = link.get("last_used")
+            if last_used is not None and last_used >= since:
+                used[link["uid"]] = max(last_used, used.get(link["uid"], 0))
+        return sorted(used, key=used.get, reverse=True)
+
+
+class SQLiteLinkStore:
+    """Linked accounts in a SQLite database in WAL mode, keyed and indexed by user id and uid.
+
+    One dedicated thread owns the connection and runs every query, so writes
+    are single row upserts instead of rewriting every link. The schema version
+    lives in PRAGMA user_version and each migration step runs once. On first
+    open the links in `import_from` (the old storage.json) are copied in once.
+    """
+
+    def __init__(self, path=LINK_DB_FILE, import_from=STORAGE_FILE):
+        self.path = path
+        self.import_from = import_from
+        self._executor = None
+        self._db = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def open(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='link-store')
+            await self._run(self._open)
+
+    def _open(self):
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._import_json()
+
+    def _migrate(self):
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS links (user_id TEXT PRIMARY KEY, uid TEXT NOT NULL, pfp TEXT)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS links_uid ON links (uid)")
+                self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                self._db.execute("PRAGMA user_version = 1")
+        if version < 2:
+            rows = self._db.execute("SELECT user_id, uid, pfp FROM links").fetchall()
+            links, quarantined = clean_links({user_id: {"uid": uid, "pfp": pfp} for user_id, uid, pfp in rows})
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS quarantine (user_id TEXT PRIMARY KEY, uid TEXT, pfp TEXT)"
+                )
+                self._quarantine(quarantined)
+                self._db.executemany(
+                    "UPDATE links SET uid = ?, pfp = ? WHERE user_id = ?",
+                    [(link["uid"], link["pfp"], user_id) for user_id, link in links.items()]
+                )
+                self._db.execute("PRAGMA user_version = 2")
+        if version < 3:
+            with self._db:
+                self._db.execute("ALTER TABLE links ADD COLUMN last_used REAL")
+                self._db.execute("CREATE INDEX IF NOT EXISTS links_last_used ON links (last_used)")
+                self._db.execute("PRAGMA user_version = 3")
+
+    def _quarantine(self, links):
+        """Move rows whose uid is not a valid uid out of links. Call inside a transaction."""
+        self._db.executemany(
+            "INSERT OR REPLACE INTO quarantine (user_id, uid, pfp) VALUES (?, ?, ?)",
+            [(user_id, link.get("uid"), link.get("pfp")) for user_id, link in links.items()]
+        )
+        self._db.executemany("DELETE FROM links WHERE user_id = ?", [(user_id,) for user_id in links])
+        if links:
+            print(f"Quarantined {len(links)} linked accounts with an invalid uid")
+
+    def _import_json(self):
+        if not self.import_from or self._db.execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone():
+            return
+        document = migrate_json_document(read_json(self.import_from))
+        links = document["links"]
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO links (user_id, uid, pfp) VALUES (?, ?, ?)",
+                [(user_id, link["uid"], link["pfp"]) for user_id, link in links.items()]
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO quarantine (user_id, uid, pfp) VALUES (?, ?, ?)",
+                [(user_id, link.get("uid"), link.get("pfp")) for user_id, link in document["quarantine"].items()]
+            )
+            self._db.execute("INSERT INTO meta (key, value) VALUES ('imported', ?)", (self.import_from,))
+        print(f"Imported {len(links)} linked accounts from {self.import_from}")
+
+    async def close(self):
+        if self._executor is not None:
+            await self._run(self._db.close)
+            self._executor.shutdown()
+            self._executor = None
+            self._db = None
+
+    def _get(self, user_id):
+        row = self._db.execute("SELECT uid, pfp FROM links WHERE user_id = ?", (user_id,)).fetchone()
+        return tuple(row) if row else (None, None)
+
+    async def get(self, user_id):
+        """(uid, pfp link) linked to a Discord user, or (None, None)."""
+        return await self._run(self._get, str(user_id))
+
+    def _set(self, user_id, uid, pfp):
+        with self._db:
+            self._db.execute(
+                "INSERT INTO links (user_id, uid, pfp) VALUES (?, ?, ?) "
+                "ON CONFLICT (user_id) DO UPDATE SET uid = excluded.uid, pfp = excluded.pfp",
+                (user_id, uid, pfp)
+            )
+
+    async def set(self, user_id, uid, pfp=None):
+        await self._run(self._set, str(user_id), uid, pfp)
+
+    def _delete(self, user_id):
+        with self._db:
+            self._db.execute("DELETE FROM links WHERE user_id = ?", (user_id,))
+
+    async def delete(self, user_id):
+        await self._run(self._delete, str(user_id))
+
+    def _users_of(self, uid):
+        return [row[0] for row in self._db.execute("SELECT user_id FROM links WHERE uid = ?", (uid,))]
+
+    async def users_of(self, uid):
+        """Discord user ids linked to a uid."""
+        return await self._run(self._users_of, uid)
+
+    def _touch(self, user_id, when):
+        with self._db:
+            self._db.execute("UPDATE links SET last_used = ? WHERE user_id = ?", (when, user_id))
+
+    async def touch(self, user_id, when=None):
+        """Note that a user just used their link."""
+        await self._run(self._touch, str(user_id), when if when is not None else time.time())
+
+    def _recent_uids(self, since):
+        return [row[0] for row in self._db.execute(
+            "SELECT uid FROM links WHERE last_used >= ? GROUP BY uid ORDER BY MAX(last_used) DESC", (since,)
+        )]
+
+    async def recent_uids(self, since):
+        """Linked uids used at or after `since`, most recently used first."""
+        return await self._run(self._recent_uids, since)
+
+def create_link_store(backend=None):
+    """The link store named by STORAGE_BACKEND: 'sqlite' (the default) or 'json'."""
+    backend = backend or os.getenv('STORAGE_BACKEND', 'sqlite')
+    if backend == 'json':
+        return JsonLinkStore()
+    if backend != 'sqlite':
+        print(f"Unknown storage backend {backend}, using sqlite")
+    return SQLiteLinkStore()
@@ -0,0 +1,58 @@
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import parsers  # noqa: E402
+import test_parsers  # noqa: E402
+import test_servers  # noqa: E402
+
+# Times the current code against the code it replaced, on the saved fixtures:
+#     python tests/bench.py
+
+NUMBER = 200
+
+
+def report(name, old, new):
+    old_time = min(timeit.repeat(old, number=NUMBER, repeat=5)) / NUMBER
+    new_time = min(timeit.repeat(new, number=NUMBER, repeat=5)) / NUMBER
+    print(f"{name:<40} old {old_time * 1e6:9.1f} us   new {new_time * 1e6:9.1f} us   {old_time / new_time:5.1f}x")
+
+
+def bench_squad_wins():
+    html = test_parsers.read_fixture('squad.html')
+    for backend in test_parsers.BACKENDS:
+        if (backend == 'selectolax' and parsers.HTMLParser is None) or (backend == 'lxml' and not parsers.HAS_LXML):
+            continue
+        parsers.set_backend(backend)
+        report(f"squad wins ({backend})", lambda: test_parsers.baseline_squad_wins(html), lambda: parsers.parse_squad_wins(html))
+    parsers.set_backend(None)
+
+
+def bench_findmatch():
+    bodies = test_servers.BODIES
+    index = test_servers.build_index(bodies)
+    for search in test_servers.SEARCHES[1:6]:
+        report(
+            f"findmatch {search[1]} in {len(search[4])} regions",
+            lambda: test_servers.baseline_game_check(search, bodies),
+            lambda: test_servers.index_query(index, search)
+        )
+    report(
+        "decode every region",
+        lambda: [
+            [(int(data[1]), int(data[2]), int(data[3])) for data in (server.split(",") for server in test_servers.baseline_servers(region, text)[1:])]
+            for region, text in bodies.items()
+        ],
+        lambda: [test_servers.ServerList.parse(region, text) for region, text in bodies.items()]
+    )
+    # Paid once per poll, not per search
+    build_time = min(timeit.repeat(lambda: test_servers.build_index(bodies), number=NUMBER, repeat=5)) / NUMBER
+    print(f"{'decode and index every region':<40} {build_time * 1e6:9.1f} us per poll")
+
+
+if __name__ == '__main__':
+    bench_squad_wins()
+    bench_findmatch()
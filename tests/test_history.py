@@ -0,0 +1,93 @@
+import asyncio
+import os
+import history
+from snapshots import PlayerSnapshot
+
+UID = '5d2ead35d142affb05757778'
+DAY = 24 * 3600
+NOW = 1700000000.0
+
+
+def snapshot(fetched_at, kills, xp, kills_elo=1800.0, br_wins=None):
+    return PlayerSnapshot(
+        UID, "Sniper's Dream", 56, xp, kills_elo, 1600.0, kills, kills // 2,
+        classic_wins=30, br_wins=br_wins, zombie_br_wins=1, fetched_at=fetched_at
+    )
+
+
+def paths(tmp_path):
+    return os.path.join(tmp_path, 'history.dat'), os.path.join(tmp_path, 'history.idx')
+
+
+async def record_all(store, snapshots):
+    await store.open()
+    for item in snapshots:
+        await store.record(item)
+    await store.close()
+
+
+def test_record_layout_round_trips_missing_numbers():
+    values = history.snapshot_values(snapshot(NOW, 100, None))
+    uid, previous, read = history.unpack(history.pack(UID, 42, values))
+    assert (uid, previous) == (UID, 42)
+    assert tuple(read.values()) == values
+    assert read["xp"] is None and read["br_wins"] is None
+    assert len(history.pack(UID, history.NO_PREVIOUS, values)) == history.RECORD.size
+
+
+def test_points_and_deltas_survive_a_reopen(tmp_path):
+    path, index_path = paths(tmp_path)
+    asyncio.run(record_all(history.HistoryStore(path, index_path), [
+        snapshot(NOW - 10 * DAY, 100, 1000),
+        snapshot(NOW - 9 * DAY, 100, 1000),  # same numbers, not stored
+        snapshot(NOW - 2 * DAY, 150, 1500),
+        snapshot(NOW - 60, 180, 1900, kills_elo=1812.5)
+    ]))
+    assert os.path.getsize(path) == 3 * history.RECORD.size
+
+    async def read():
+        store = history.HistoryStore(path, index_path)
+        await store.open()
+        try:
+            return await store.points(UID), await store.points(UID, since=NOW - DAY), await store.points(UID, limit=1)
+        finally:
+            await store.close()
+
+    points, recent, newest = asyncio.run(read())
+    assert [point["kills"] for point in points] == [180, 150, 100]
+    # Stops at the first point older than `since`, which is kept as the baseline
+    assert [point["kills"] for point in recent] == [180, 150]
+    assert newest == points[:1]
+
+    changes, covered = history.deltas(points, DAY, now=NOW)
+    assert (changes["kills"], changes["xp"], changes["kills_elo"], covered) == (30, 400, 12.5, 2 * DAY - 60)
+    assert changes["br_wins"] is None
+    # History shorter than the window compares against the oldest point
+    changes, covered = history.deltas(points, 30 * DAY, now=NOW)
+    assert (changes["kills"], covered) == (80, 10 * DAY - 60)
+
+
+def test_reopen_catches_up_records_missing_from_the_index(tmp_path):
+    path, index_path = paths(tmp_path)
+    asyncio.run(record_all(history.HistoryStore(path, index_path), [snapshot(NOW - DAY, 100, 1000)]))
+    with open(index_path) as f:
+        saved_index = f.read()
+
+    asyncio.run(record_all(history.HistoryStore(path, index_path), [snapshot(NOW, 120, 1200)]))
+    # As if the bot stopped before the index was written, after a half written record
+    with open(index_path, 'w') as f:
+        f.write(saved_index)
+    with open(path, 'ab') as f:
+        f.write(b'\0' * (history.RECORD.size // 2))
+
+    async def read():
+        store = history.HistoryStore(path, index_path)
+        await store.open()
+        try:
+            return await store.points(UID), store.index["length"]
+        finally:
+            await store.close()
+
+    points, length = asyncio.run(read())
+    assert [point["kills"] for point in points] == [120, 100]
+    assert length == os.path.getsize(path) == 2 * history.RECORD.size
@@ -0,0 +1,34 @@
+import asyncio
+import http_client
+from ratelimit import RateLimitTimeout
+
+
+def test_metrics_keep_limiter_and_breaker_failures_apart():
+    url = "https://metrics.example/players"
+    bucket = http_client.get_bucket(url)
+    breaker = http_client.get_breaker(url)
+    bucket.record_failure()
+    bucket.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+
+    host = http_client.metrics()["metrics.example"]
+    assert host["limiter"]["failures"] == 2
+    assert host["breaker"]["failures"] == 0
+    assert host["breaker"]["state"] == "closed"
+
+
+def test_our_own_queue_does_not_open_the_breaker():
+    url = "https://queue.example/players"
+    bucket = http_client.get_bucket(url)
+    bucket.tokens = 0
+    bucket.rate = bucket.min_rate
+    bucket.max_wait = 0.05
+
+    async def run():
+        return await asyncio.gather(*(http_client.fetch_text(url) for _ in range(20)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RateLimitTimeout) for result in results)
+    assert http_client.metrics()["queue.example"]["breaker"]["state"] == "closed"
+    assert http_client.get_breaker(url).failures == 0
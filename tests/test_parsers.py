@@ -0,0 +1,131 @@
+import os
+import pytest
+from bs4 import BeautifulSoup
+import parsers
+
+# Every backend must read the saved pages exactly like the find_all code
+# that scraped them before parsers.Document existed.
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+BACKENDS = ['selectolax', 'lxml', 'html.parser']
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as file:
+        return file.read()
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    if request.param == 'selectolax' and parsers.HTMLParser is None:
+        pytest.skip("selectolax is not installed")
+    if request.param == 'lxml' and not parsers.HAS_LXML:
+        pytest.skip("lxml is not installed")
+    parsers.set_backend(request.param)
+    yield request.param
+    parsers.set_backend(None)
+
+
+# Baseline scraping code, as it was in main.py
+
+def baseline_profile(html):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    numbers = {}
+    header_elements = soup.find_all("div", class_="player-details-number-box-header")
+    value_elements = soup.find_all("div", class_="player-details-number-box-value")
+    for header, value in zip(header_elements, value_elements):
+        numbers[header.text.strip()] = value.text.strip()
+
+    player_name_parts = soup.find("div", class_="page-header").get_text(strip=True).split('Lvl')
+    name = player_name_parts[0].strip()
+    level = int(player_name_parts[1].strip())
+
+    content = soup.find_all('div', class_="ribbon-wrapper")
+    ribbon_groups = str(content).split('purpleHeart')
+    ribbons = str(ribbon_groups[0]).split(
+        'style=&quot;background:#454658;&quot;&gt;'
+    ) if len(ribbon_groups) == 3 else str(
+        ribbon_groups[2]).split(
+            'style=&quot;background:#454658;&quot;&gt;')
+    ribbons.pop(0)
+    ribbons.pop(-1)
+    medals = {tier: 0 for tier in parsers.MEDAL_TIERS}
+    for ribbon in ribbons:
+        stars = str(ribbon).count('&amp;#10031;')
+        medals[parsers.STAR_TIERS.get(stars, 'Unearned')] += 1
+
+    dailies = []
+    daily_rankings = soup.find("div", id="player-details-dailies-content")
+    if daily_rankings:
+        for element in daily_rankings.find_all("div", class_="player-details-daily-circle-container"):
+            medal = element.find("div", class_="player-details-daily-circle").text.strip()
+            title = element.find("div", class_="tooltip-header").text.strip()
+            dailies.append((medal, title))
+
+    return numbers, name, level, medals, dailies
+
+
+def baseline_elo(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    xp = soup.find('span', string='XP').find_next('span').text.strip()
+    kills_elo = soup.find('span', string='Kills Elo').find_next('span').text
+    games_elo = soup.find('span', string='Games Elo').find_next('span').text
+    return int(xp), float(kills_elo.strip()), float(games_elo.strip())
+
+
+def baseline_squad_wins(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    return {
+        mode: soup.find('div', string=lambda text: text and mode in text).find_next_sibling('div').string.strip()
+        for mode in parsers.SQUAD_MODES
+    }
+
+
+@pytest.mark.parametrize('page', ['profile.html', 'profile_two_ribbon_lists.html'])
+def test_profile_matches_baseline(backend, page):
+    html = read_fixture(page)
+    numbers, name, level, medals, dailies = baseline_profile(html)
+    snapshot = parsers.parse_player('5d2ead35d142affb05757778', html)
+
+    assert parsers.parse_number_boxes(parsers.Document(html, parsers.PROFILE_STRAINER)) == numbers
+    assert (snapshot.name, snapshot.level) == (name, level)
+    assert snapshot.kills == parsers.parse_int(numbers["Kills"])
+    assert snapshot.deaths == parsers.parse_int(numbers["Deaths"])
+    assert snapshot.classic_wins == parsers.parse_int(numbers["Classic Mode Wins"])
+    assert snapshot.br_wins == parsers.parse_int(numbers["Battle Royale Wins"])
+    assert snapshot.zombie_br_wins == parsers.parse_int(numbers["Zombie BR Wins"])
+    assert snapshot.medal_counts(parsers.MEDAL_TIERS) == medals
+    assert snapshot.dailies == dailies
+    assert parsers.parse_kills_deaths(html) == (snapshot.kills, snapshot.deaths)
+
+
+def test_second_ribbon_list_is_read():
+    # The two copies on this page differ, so only the second one gives these stars
+    snapshot = parsers.parse_player('5d2ead35d142affb05757778', read_fixture('profile_two_ribbon_lists.html'))
+    stars = {ribbon.name: ribbon.stars for ribbon in snapshot.ribbons}
+    assert len(snapshot.ribbons) == 6
+    assert (stars['Medic Ribbon'], stars['Pilot Ribbon']) == (2, 1)
+
+
+def test_elo_page_matches_baseline(backend):
+    xp, kills_elo, games_elo = baseline_elo(read_fixture('elo.html'))
+    assert parsers.parse_elo_page(read_fixture('elo.html')) == {
+        "xp": xp, "kills_elo": kills_elo, "games_elo": games_elo
+    }
+
+
+def test_squad_wins_match_baseline(backend):
+    html = read_fixture('squad.html')
+    assert parsers.parse_squad_wins(html) == baseline_squad_wins(html)
+
+
+def test_squad_wins_tolerate_changed_modes(backend):
+    # Package Drop is missing and a Gun Game mode was added; the original code raised here
+    html = read_fixture('squad_changed_modes.html')
+    with pytest.raises(AttributeError):
+        baseline_squad_wins(html)
+    assert parsers.parse_squad_wins(html) == {
+        "Death Match": "1,204", "Battle Royale": "311", "Missile Launch": "97",
+        "Vehicle Escort": "150", "Capture Point": "422", "Zombie BR": "12", "Gun Game": "5"
+    }
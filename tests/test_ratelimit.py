@@ -0,0 +1,50 @@
+import asyncio
+import time
+import pytest
+from ratelimit import AdaptiveTokenBucket, RateLimitTimeout
+
+
+def make_bucket(**options):
+    return AdaptiveTokenBucket(rate=10.0, burst=1, min_rate=0.5, max_rate=20.0, **options)
+
+
+def test_retry_after_pause_is_clamped():
+    bucket = make_bucket(max_pause=5.0)
+    bucket.record(429, "3600")
+    assert bucket.paused_until - time.monotonic() <= 5.0
+
+
+def test_acquire_fails_fast_while_paused_past_max_wait():
+    bucket = make_bucket(max_wait=0.2)
+    bucket.record(429, "30")
+    started = time.monotonic()
+    with pytest.raises(RateLimitTimeout):
+        asyncio.run(bucket.acquire())
+    assert time.monotonic() - started < 0.1
+    assert bucket.metrics()["timeouts"] == 1
+
+
+def test_acquire_gives_up_on_a_long_queue():
+    bucket = make_bucket(max_wait=0.25)
+    bucket.rate = bucket.min_rate  # one token every two seconds once the burst is spent
+
+    async def run():
+        return await asyncio.gather(*(bucket.acquire() for _ in range(3)), return_exceptions=True)
+
+    started = time.monotonic()
+    results = asyncio.run(run())
+    assert results[0] is None
+    assert all(isinstance(result, RateLimitTimeout) for result in results[1:])
+    assert time.monotonic() - started < 0.5
+
+
+def test_acquire_waits_when_within_max_wait():
+    bucket = make_bucket(max_wait=1.0)
+
+    async def run():
+        await bucket.acquire()
+        await bucket.acquire()
+
+    asyncio.run(run())
+    assert bucket.metrics()["requests"] == 2
+    assert bucket.metrics()["timeouts"] == 0
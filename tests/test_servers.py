@@ -0,0 +1,136 @@
+import asyncio
+import random
+import pytest
+import catalog
+import http_client
+from servers import ServerIndex, ServerList, ServerPoller
+
+# ServerIndex.query must find exactly the servers the original per-request
+# split and check_server filter found, for every kind of /findmatch search.
+
+REGIONS = ['USA', 'EU', 'ASIA']
+MODES = sorted(set(catalog.MODE_IDS.values()))
+MAPS = sorted(set(catalog.MAP_IDS.values()))
+
+
+def synthetic_body(region, seed, count=300):
+    """A server_list.php body: one server per line as ip,region,id,mode,players,map,max players,name."""
+    rng = random.Random(seed)
+    lines = []
+    for server in range(count):
+        players = rng.choice([0, 0, rng.randint(1, 16)])
+        lines.append(
+            f"10.0.{server // 250}.{server % 250},{region},{server},{rng.choice(MODES)},"
+            f"{players},{rng.choice(MAPS)},16,Server {server}"
+        )
+    return "\n".join(lines)
+
+
+BODIES = {region: synthetic_body(region, seed) for seed, region in enumerate(REGIONS)}
+
+
+# Baseline filtering code, as it was in main.py
+
+def baseline_servers(region, text):
+    return text.split(f",{region},")
+
+
+def check_server(set_data, server_data):
+    players = int(server_data[2])
+    mode = int(server_data[1])
+    map = int(server_data[3])
+
+    if players == 0:
+        return False
+
+    if set_data[1][0] and players < set_data[1][1]:
+        return False
+    if not set_data[1][0] and players > set_data[1][1]:
+        return False
+
+    if set_data[2] != "all" and mode not in set_data[2]:
+        return False
+
+    if set_data[3] != "all" and map not in set_data[3]:
+        return False
+
+    return True
+
+
+def baseline_game_check(set_data, bodies):
+    matches = []
+    for region in set_data[4]:
+        server_data = baseline_servers(region, bodies[region])
+        for server in server_data[1:]:
+            data = server.split(",")
+            if check_server(set_data, data):
+                matches.append((region, int(data[1]), int(data[3]), int(data[2])))
+    return matches
+
+
+def index_query(index, set_data):
+    wants_more, player_count = set_data[1]
+    return index.query(
+        set_data[4],
+        modes=None if set_data[2] == "all" else set_data[2],
+        maps=None if set_data[3] == "all" else set_data[3],
+        min_players=player_count if wants_more else None,
+        max_players=None if wants_more else player_count
+    )
+
+
+def build_index(bodies):
+    return ServerIndex({region: ServerList.parse(region, text) for region, text in bodies.items()})
+
+
+SEARCHES = [
+    ["classic", (True, 0), "all", "all", REGIONS],
+    ["classic", (True, 8), "all", "all", REGIONS],
+    ["classic", (False, 4), "all", "all", ['EU']],
+    ["classic", (True, 1), [catalog.MODE_IDS['teamdeathmatch']], "all", REGIONS],
+    ["classic", (False, 10), "all", [catalog.MAP_IDS['moonbase']], ['ASIA', 'USA']],
+    ["classic", (True, 5), [catalog.MODE_IDS['missilelaunch']], [catalog.MAP_IDS['desert']], REGIONS],
+    ["classic", (True, 17), "all", "all", REGIONS],
+    ["classic", (True, 1), "all", "all", ['NOWHERE']],
+]
+
+
+def test_parse_reads_every_server():
+    for region, text in BODIES.items():
+        servers = ServerList.parse(region, text)
+        baseline = [server.split(",") for server in baseline_servers(region, text)[1:]]
+        assert list(servers.modes) == [int(data[1]) for data in baseline]
+        assert list(servers.players) == [int(data[2]) for data in baseline]
+        assert list(servers.maps) == [int(data[3]) for data in baseline]
+
+
+@pytest.mark.parametrize('search', SEARCHES)
+def test_query_matches_check_server(search):
+    bodies = dict(BODIES, NOWHERE="")
+    found = index_query(build_index(bodies), search)
+    assert sorted(found) == sorted(baseline_game_check(search, bodies))
+    # Regions still come back in the order they were asked for
+    assert [region for region, *_ in found] == sorted(
+        (region for region, *_ in found), key=search[4].index
+    )
+
+
+def test_failed_poll_keeps_the_last_good_servers(monkeypatch):
+    answers = [(200, BODIES['USA']), (503, "Service Unavailable"), (429, "Too Many Requests")]
+
+    async def fetch_text(url):
+        return answers.pop(0)
+
+    monkeypatch.setattr(http_client, 'fetch_text', fetch_text)
+    poller = ServerPoller(['USA'], interval=30, timeout=5)
+
+    async def run():
+        sizes = []
+        for _ in range(3):
+            await poller.refresh()
+            sizes.append(poller.index.size)
+        return sizes
+
+    sizes = asyncio.run(run())
+    assert sizes[0] > 0
+    assert sizes == [sizes[0]] * 3
@@ -0,0 +1,17 @@
+from snapshots import PlayerSnapshot, Ribbon
+
+
+def test_fill_missing_keeps_numbers_a_down_source_would_have_given():
+    older = PlayerSnapshot(
+        'a', 'Old Name', 55, 1000, 1800.0, 1600.0, 120, 60, kd=2.0, classic_wins=30, br_wins=4,
+        zombie_br_wins=1, ribbons=[Ribbon('Sniper Ribbon', 'Gold', 4)], dailies=[('#3', 'Most Kills')]
+    )
+    # Built from the API alone while the profile page was down
+    partial = PlayerSnapshot('a', 'New Name', 56, 1100, 1810.0, 1605.0, None, None, unavailable=['stats.warbrokers.io'])
+    partial.fill_missing(older)
+
+    assert (partial.name, partial.level, partial.xp, partial.kills_elo) == ('New Name', 56, 1100, 1810.0)
+    assert (partial.kills, partial.deaths, partial.kd, partial.classic_wins) == (120, 60, 2.0, 30)
+    assert partial.ribbons == older.ribbons
+    assert partial.dailies == []
+    assert partial.unavailable == ['stats.warbrokers.io']
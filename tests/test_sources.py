@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+import http_client
+import sources
+from test_parsers import read_fixture
+
+UID = '5d2ead35d142affb05757778'
+API_PLAYER = {"nick": "Sniper's Dream", "level": 56, "time": 1700000000, "losses": {"m00": 12}}
+
+
+def serve(monkeypatch, responses):
+    """Answer http_client fetches from {host: (status, body)}."""
+    async def fetch(url):
+        return responses[sources.host_of(url)]
+    monkeypatch.setattr(http_client, 'fetch_json', fetch)
+    monkeypatch.setattr(http_client, 'fetch_text', fetch)
+
+
+def hosts(profile, elo, api=(200, API_PLAYER)):
+    return {
+        sources.host_of(sources.API_URL): api,
+        sources.host_of(sources.PROFILE_URL): profile,
+        sources.host_of(sources.ELO_PAGE_URL): elo
+    }
+
+
+@pytest.mark.parametrize('status', [429, 503, 403])
+def test_profile_error_degrades_to_api_fields(monkeypatch, status):
+    serve(monkeypatch, hosts((status, "Too Many Requests"), (200, read_fixture('elo.html'))))
+    snapshot = asyncio.run(sources.fetch_player(UID))
+    assert snapshot is not None
+    assert (snapshot.name, snapshot.level, snapshot.kills_elo) == ("Sniper's Dream", 56, 1834.52)
+    assert snapshot.kills is None
+    assert snapshot.unavailable == [sources.host_of(sources.PROFILE_URL)]
+
+
+def test_profile_404_means_unknown_uid(monkeypatch):
+    serve(monkeypatch, hosts((404, "Not Found"), (200, read_fixture('elo.html'))))
+    assert asyncio.run(sources.fetch_player(UID)) is None
+
+
+@pytest.mark.parametrize('status', [429, 404, 500])
+def test_elo_page_error_leaves_its_fields_empty(monkeypatch, status):
+    serve(monkeypatch, hosts((200, read_fixture('profile.html')), (status, "")))
+    snapshot = asyncio.run(sources.fetch_player(UID))
+    assert snapshot.kills == 12345
+    assert (snapshot.xp, snapshot.kills_elo, snapshot.games_elo) == (None, None, None)
+
+
+@pytest.mark.parametrize('status', [429, 502])
+def test_squad_members_outage_is_not_an_unknown_tag(monkeypatch, status):
+    serve(monkeypatch, {sources.host_of(sources.API_URL): (status, None)})
+    with pytest.raises(sources.SourcesUnavailable) as error:
+        asyncio.run(sources.fetch_squad_members("DREAM"))
+    assert error.value.hosts == [sources.host_of(sources.API_URL)]
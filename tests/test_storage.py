@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+import sqlite3
+import storage
+
+# A storage.json as older versions of the bot wrote it: no version, a bare
+# uid string, a picture link glued onto the uid, a stats page link and a
+# uid that cannot be recovered.
+LEGACY_DOCUMENT = {
+    "111": {"uid": "5D2EAD35D142AFFB05757778 pfpimgurlink: https://i.imgur.com/a.png", "pfp": None},
+    "222": "5d2ead35d142affb05757779",
+    "333": {"uid": "not-a-uid", "pfp": None},
+    "444": {"uid": "https://stats.warbrokers.io/players/i/5d2ead35d142affb0575777a", "pfp": "https://i.imgur.com/b.png"}
+}
+EXPECTED_LINKS = {
+    "111": ("5d2ead35d142affb05757778", "https://i.imgur.com/a.png"),
+    "222": ("5d2ead35d142affb05757779", None),
+    "444": ("5d2ead35d142affb0575777a", "https://i.imgur.com/b.png")
+}
+
+
+def write_legacy_json(tmp_path):
+    path = os.path.join(tmp_path, 'storage.json')
+    with open(path, 'w') as f:
+        json.dump(LEGACY_DOCUMENT, f)
+    return path
+
+
+async def read_links(store):
+    return {user_id: await store.get(user_id) for user_id in LEGACY_DOCUMENT}
+
+
+def test_json_store_migrates_once(tmp_path):
+    path = write_legacy_json(tmp_path)
+
+    async def run():
+        store = storage.JsonLinkStore(path, interval=0)
+        await store.open()
+        links = await read_links(store)
+        await store.close()
+        return links
+
+    links = asyncio.run(run())
+    assert links == {**EXPECTED_LINKS, "333": (None, None)}
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved["version"] == storage.SCHEMA_VERSION
+    assert saved["quarantine"] == {"333": {"uid": "not-a-uid", "pfp": None}}
+
+    # Already migrated, so opening it again changes nothing and writes nothing
+    written_at = os.stat(path).st_mtime_ns
+    store = storage.JsonLinkStore(path, interval=0)
+    assert store.document == saved
+    assert not store.persister.dirty
+    asyncio.run(store.close())
+    assert os.stat(path).st_mtime_ns == written_at
+
+
+def test_sqlite_store_imports_and_migrates_once(tmp_path):
+    json_path = write_legacy_json(tmp_path)
+    db_path = os.path.join(tmp_path, 'storage.db')
+
+    async def run(check):
+        store = storage.SQLiteLinkStore(db_path, import_from=json_path)
+        await store.open()
+        try:
+            return await check(store)
+        finally:
+            await store.close()
+
+    async def first_open(store):
+        links = await read_links(store)
+        # Removed after the import, so a second import would bring it back
+        await store.delete("222")
+        return links
+
+    assert asyncio.run(run(first_open)) == {**EXPECTED_LINKS, "333": (None, None)}
+    assert asyncio.run(run(read_links)) == {**EXPECTED_LINKS, "222": (None, None), "333": (None, None)}
+
+    db = sqlite3.connect(db_path)
+    assert db.execute("PRAGMA user_version").fetchone()[0] == storage.SCHEMA_VERSION
+    assert db.execute("SELECT user_id, uid FROM quarantine").fetchall() == [("333", "not-a-uid")]
+    db.close()
+
+
+def test_sqlite_migration_cleans_version_1_rows(tmp_path):
+    db_path = os.path.join(tmp_path, 'storage.db')
+    db = sqlite3.connect(db_path)
+    db.execute("CREATE TABLE links (user_id TEXT PRIMARY KEY, uid TEXT NOT NULL, pfp TEXT)")
+    db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    db.execute("INSERT INTO meta VALUES ('imported', 'storage.json')")
+    db.executemany("INSERT INTO links VALUES (?, ?, ?)", [
+        ("111", LEGACY_DOCUMENT["111"]["uid"], None),
+        ("333", "not-a-uid", None)
+    ])
+    db.execute("PRAGMA user_version = 1")
+    db.commit()
+    db.close()
+
+    async def run():
+        store = storage.SQLiteLinkStore(db_path, import_from=None)
+        await store.open()
+        links = (await store.get("111"), await store.get("333"))
+        await store.touch("111", when=1000.0)
+        recent = await store.recent_uids(0)
+        await store.close()
+        return links, recent
+
+    links, recent = asyncio.run(run())
+    assert links == (EXPECTED_LINKS["111"], (None, None))
+    assert recent == ["5d2ead35d142affb05757778"]
+
+    # Reopening runs no migration step again and keeps every row as it was
+    before = sqlite3.connect(db_path).execute("SELECT * FROM links").fetchall()
+    assert asyncio.run(run())[0] == (EXPECTED_LINKS["111"], (None, None))
+    db = sqlite3.connect(db_path)
+    assert db.execute("SELECT * FROM links").fetchall() == before
+    assert db.execute("SELECT COUNT(*) FROM quarantine").fetchone()[0] == 1
+    db.close()
@@ -0,0 +1,37 @@
+import asyncio
+from cache import TTLCache
+from snapshots import PlayerSnapshot
+from warmer import PlayerWarmer
+
+
+def make_warmer(loader, uids):
+    cache = TTLCache(ttl=60, max_stale=600, max_entries=100, stale_if=lambda snapshot: bool(snapshot.unavailable))
+
+    async def recent_uids(since):
+        return uids
+
+    return cache, PlayerWarmer(cache, loader, recent_uids, budget=60, refresh_after=45, max_idle=3600)
+
+
+def test_partial_snapshots_do_not_starve_other_players():
+    loaded = []
+
+    async def loader(uid):
+        loaded.append(uid)
+        # Every load is partial, as if the profile page were down
+        return PlayerSnapshot(uid, uid, 1, None, None, None, None, None, unavailable=["stats.warbrokers.io"])
+
+    cache, warmer = make_warmer(loader, ['a', 'b', 'c'])
+
+    async def run():
+        for _ in range(5):
+            uid = warmer._due(await warmer.recent_uids(0))
+            if uid is not None:
+                await warmer._warm(uid)
+
+    asyncio.run(run())
+    assert loaded == ['a', 'b', 'c']
+    assert warmer.error_rate > 0
+    assert warmer.backoff > 1
+    # Still cached, so /stats can fall back to them
+    assert cache.peek('a') is not None
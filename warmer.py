@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+# Background refresh of linked players, so their /stats is answered from a
+# fresh cache entry instead of waiting on the stats sites.
+
+
+class PlayerWarmer:
+    """Keeps the cached snapshots of recently active linked players fresh.
+
+    Each step asks `recent_uids(since)` for the linked uids used within
+    `max_idle` seconds, most recent first, and reloads the first one whose
+    cache entry is missing or older than `refresh_after`; a uid that failed,
+    or only loaded partly because a source was down, waits `refresh_after`
+    before it is tried again. Steps are spaced to
+    spend at most `budget` player lookups per minute. The spacing doubles
+    (up to `max_backoff` times) while lookups are slow or failing, and halves
+    back once they recover.
+    """
+
+    # Weight of the newest lookup in the running latency and error averages
+    SMOOTHING = 0.2
+
+    def __init__(
+        self, cache, loader, recent_uids, budget, refresh_after, max_idle,
+        slow_latency=5.0, max_error_rate=0.3, max_backoff=32, timeout=30
+    ):
+        self.cache = cache
+        self.loader = loader
+        self.recent_uids = recent_uids
+        self.budget = budget
+        self.refresh_after = refresh_after
+        self.max_idle = max_idle
+        self.slow_latency = slow_latency
+        self.max_error_rate = max_error_rate
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.backoff = 1
+        self._retry_at = {}  # uid -> monotonic time a failed uid may be tried again
+        self._task = None
+
+    @property
+    def delay(self):
+        """Seconds between lookups right now."""
+        return 60 / self.budget * self.backoff
+
+    def _due(self, uids):
+        now = time.monotonic()
+        for uid in uids:
+            if self._retry_at.get(uid, 0) > now:
+                continue
+            entry = self.cache.peek(uid)
+            if entry is None or entry[1] >= self.refresh_after:
+                return uid
+        return None
+
+    async def _warm(self, uid):
+        started = time.monotonic()
+        try:
+            snapshot = await asyncio.wait_for(self.loader(uid), timeout=self.timeout)
+        except Exception as e:
+            print(f"Error warming {uid}: {e!r}")
+            snapshot = None
+        # A partial snapshot is cached already stale, so it must not count as warmed
+        failed = snapshot is None or bool(getattr(snapshot, 'unavailable', None))
+        if snapshot is not None:
+            self.cache.set(uid, snapshot)
+        if failed:
+            # Let the next players have a turn before this one is tried again
+            self._retry_at[uid] = time.monotonic() + self.refresh_after
+        else:
+            self._retry_at.pop(uid, None)
+
+        self.latency += self.SMOOTHING * (time.monotonic() - started - self.latency)
+        self.error_rate += self.SMOOTHING * (failed - self.error_rate)
+        if self.latency > self.slow_latency or self.error_rate > self.max_error_rate:
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+        else:
+            self.backoff = max(self.backoff // 2, 1)
+
+    async def _run(self):
+        while True:
+            try:
+                uid = self._due(await self.recent_uids(time.time() - self.max_idle))
+                if uid is not None:
+                    await self._warm(uid)
+            except Exception as e:
+                print(f"Error in player warmer: {e!r}")
+            await asyncio.sleep(self.delay)
+
+    def start(self):
+        if self.budget > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None